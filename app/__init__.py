@@ -751,7 +751,7 @@ def create_app():
         vehicle = (
             db.session.query(Vehicle)
             .join(Auction, Vehicle.auction_id == Auction.id, isouter=True)
-            .filter(db.func.lower(Vehicle.vin) == db.func.lower(vin_norm))
+            .filter(db.func.upper(Vehicle.vin) == db.func.upper(vin_norm))
             .first()
         )
         if not vehicle:
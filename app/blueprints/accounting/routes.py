@@ -1,6 +1,6 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file, abort, current_app, jsonify
-from flask_babel import gettext as _
-from flask_login import login_required
+from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file, abort, current_app, jsonify, g, has_request_context
+from flask_babel import gettext as _, get_locale
+from flask_login import login_required, current_user
 from ...security import role_required
 from ...extensions import db, mail
 from ...models import (
@@ -23,16 +23,50 @@ from ...models import (
     ClientAccountStructure,
     VehicleAccountStructure,
     Auction,
+    AuditLog,
 )
-from ...utils_pdf import render_invoice_pdf, render_bol_pdf, render_vehicle_statement_pdf
+from ...utils_pdf import render_invoice_pdf, render_invoice_pdf_with_bytes, render_bol_pdf, render_bol_pdf_with_bytes, render_vehicle_statement_pdf
+from ...utils.monthly import last_month_starts, monthly_sums_stmt, sums_by_month
+from ...utils.numbering import next_document_number
 from ...utils.storage import save_file_to_storage
 from flask_mail import Message
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload, selectinload
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
-from decimal import Decimal
-import requests
+from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache
+import atexit
+import contextlib
+import hashlib
+import numpy as np
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
 
 acct_bp = Blueprint("acct", __name__, template_folder="templates/accounting")
 
+# Map Arabic-Indic and Eastern Arabic-Indic digits; normalize separators (built once at import)
+_DIGIT_TRANS = str.maketrans({
+    "٠": "0", "١": "1", "٢": "2", "٣": "3", "٤": "4",
+    "٥": "5", "٦": "6", "٧": "7", "٨": "8", "٩": "9",
+    "۰": "0", "۱": "1", "۲": "2", "۳": "3", "۴": "4",
+    "۵": "5", "۶": "6", "۷": "7", "۸": "8", "۹": "9",
+    # Decimal and thousands separators (Arabic)
+    "٫": ".",  # U+066B ARABIC DECIMAL SEPARATOR
+    "٬": "",   # U+066C ARABIC THOUSANDS SEPARATOR
+    "،": "",   # U+060C ARABIC COMMA (treat as thousands separator)
+    # Non‑breaking space
+    "\u00A0": "",
+})
+_NON_NUMERIC_RE = re.compile(r"[^\d.\-]")
+# Plain ASCII numbers ("1234", "-12.5", ".5") that normalization would return unchanged
+_PLAIN_NUMBER_RE = re.compile(r"-?(?:[0-9]+\.?[0-9]*|\.[0-9]+)")
+
 def _normalize_number_string(value: object) -> str:
     """Normalize user-entered numeric strings including Arabic-Indic digits and separators.
 
@@ -48,20 +82,9 @@ def _normalize_number_string(value: object) -> str:
     s = s.strip()
     if not s:
         return "0"
-    # Map Arabic-Indic and Eastern Arabic-Indic digits; normalize separators
-    translate_map = str.maketrans({
-        "٠": "0", "١": "1", "٢": "2", "٣": "3", "٤": "4",
-        "٥": "5", "٦": "6", "٧": "7", "٨": "8", "٩": "9",
-        "۰": "0", "۱": "1", "۲": "2", "۳": "3", "۴": "4",
-        "۵": "5", "۶": "6", "۷": "7", "۸": "8", "۹": "9",
-        # Decimal and thousands separators (Arabic)
-        "٫": ".",  # U+066B ARABIC DECIMAL SEPARATOR
-        "٬": "",   # U+066C ARABIC THOUSANDS SEPARATOR
-        "،": "",   # U+060C ARABIC COMMA (treat as thousands separator)
-        # Non‑breaking space
-        "\u00A0": "",
-    })
-    s = s.translate(translate_map)
+    if _PLAIN_NUMBER_RE.fullmatch(s):
+        return s
+    s = s.translate(_DIGIT_TRANS)
     # Handle standard commas: treat single comma (and no dot present) as decimal; otherwise remove
     if "," in s:
         if "." not in s and s.count(",") == 1:
@@ -72,14 +95,8 @@ def _normalize_number_string(value: object) -> str:
                 s = s.replace(",", "")
         else:
             s = s.replace(",", "")
-    # Remove regular spaces
-    s = s.replace(" ", "")
-    # Keep only digits, one leading '-', and dots
-    cleaned = []
-    for ch in s:
-        if ch.isdigit() or ch in ".-":
-            cleaned.append(ch)
-    s = "".join(cleaned)
+    # Keep only digits, '-' and dots (drops spaces too) in one C-level regex pass
+    s = _NON_NUMERIC_RE.sub("", s)
     if s in {"", "-", ".", "-."}:
         return "0"
     return s
@@ -90,12 +107,167 @@ def _parse_number_input(value: object) -> float:
     except Exception:
         return 0.0
 
+def _parse_decimal_input(value: object) -> Decimal:
+    """Parse user input straight to Decimal, skipping the float round-trip."""
+    try:
+        return Decimal(_normalize_number_string(value))
+    except Exception:
+        return Decimal('0')
+
+def _to_decimal(value: object) -> Decimal:
+    """Return value as Decimal, converting at most once (None -> 0)."""
+    if isinstance(value, Decimal):
+        return value
+    if not value:
+        return Decimal('0')
+    if isinstance(value, int):
+        return Decimal(value)
+    return Decimal(str(value))
+
+def _round_fils(value: float) -> float:
+    """Round an OMR float to 3 decimals half-up, as the Numeric amount columns store it."""
+    return float(Decimal(str(value)).quantize(Decimal('0.001'), ROUND_HALF_UP))
+
+@lru_cache(maxsize=4)
+def _omr_rate_decimal(val: float) -> Decimal:
+    """Decimal form of a configured USD->OMR rate, parsed once per distinct value."""
+    return Decimal(str(val))
+
+def _config_omr_rate() -> Decimal:
+    return _omr_rate_decimal(current_app.config.get('OMR_EXCHANGE_RATE', 0.385))
+
+def _config_usd_to_omr() -> float:
+    return float(current_app.config.get('OMR_EXCHANGE_RATE', 0.385))
+
+# Latest (id, rate) from exchange_rates, reused for EXCHANGE_RATE_CACHE_TTL seconds per process
+_rate_cache: dict = {'at': None, 'row': None}
+
+
+@event.listens_for(ExchangeRate, 'after_insert')
+@event.listens_for(ExchangeRate, 'after_update')
+@event.listens_for(ExchangeRate, 'after_delete')
+def _invalidate_rate_cache(mapper, connection, target):
+    _rate_cache['at'] = None
+
+
+def _latest_rate() -> tuple[int | None, Decimal]:
+    """(ExchangeRate id, rate) of the newest rate row; (None, configured rate) when there is none."""
+    now = time.monotonic()
+    at = _rate_cache['at']
+    if at is None or now - at >= current_app.config.get('EXCHANGE_RATE_CACHE_TTL', 0):
+        _rate_cache['row'] = db.session.execute(
+            db.select(ExchangeRate.id, ExchangeRate.rate).order_by(ExchangeRate.effective_at.desc()).limit(1)
+        ).first()
+        _rate_cache['at'] = now
+    row = _rate_cache['row']
+    return (row.id, _to_decimal(row.rate)) if row else (None, _config_omr_rate())
+
 def _get_account(code: str) -> Account | None:
     try:
         return db.session.query(Account).filter(Account.code == code).first()
     except Exception:
         return None
 
+def _now() -> datetime:
+    """UTC "now", computed once per request so every row written by it shares one timestamp."""
+    if not has_request_context():
+        return datetime.utcnow()
+    ts = getattr(g, '_acct_now', None)
+    if ts is None:
+        g._acct_now = ts = datetime.utcnow()
+    return ts
+
+@acct_bp.teardown_app_request
+def _clear_request_memos(exc):
+    # g outlives the request when an app context was already pushed (tests, CLI), so drop the
+    # per-request values explicitly
+    g.pop('_acct_now', None)
+    g.pop('_acct_books_locked', None)
+    g.pop('_acct_codes', None)
+    g.pop('_acct_ids', None)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _forget_account_codes(session, previous_transaction):
+    # Sub-ledger accounts created in a rolled-back transaction no longer exist
+    if has_request_context():
+        g.pop('_acct_codes', None)
+        g.pop('_acct_ids', None)
+
+@event.listens_for(Setting, 'after_insert')
+@event.listens_for(Setting, 'after_update')
+def _forget_books_lock(mapper, connection, target):
+    # A settings save later in the same request must not post against the old lock date
+    if has_request_context():
+        g.pop('_acct_books_locked', None)
+
+def _books_locked() -> bool:
+    """Whether now falls inside the locked period (Setting.books_locked_until); read once per request."""
+    locked = getattr(g, '_acct_books_locked', None) if has_request_context() else None
+    if locked is None:
+        try:
+            until = db.session.scalar(db.select(Setting.books_locked_until).limit(1))
+        except Exception:
+            until = None
+        locked = bool(until and _now() <= until)
+        if has_request_context():
+            g._acct_books_locked = locked
+    return locked
+
+def _gl_monthly_sums_stmt(amount_expr, *filters):
+    """Monthly sums of a JournalLine amount expression joined to its account and entry."""
+    return monthly_sums_stmt(
+        JournalEntry.entry_date, [amount_expr], filters, select_from=JournalLine,
+        joins=((Account, JournalLine.account_id == Account.id), (JournalEntry, JournalLine.entry_id == JournalEntry.id)),
+    )
+
+
+# Monthly series statements, built once at import; only :since changes between calls
+_REVENUE_BY_MONTH_STMT = _gl_monthly_sums_stmt(
+    JournalLine.credit - JournalLine.debit, Account.code_class == 'R', JournalEntry.is_client_fund.is_(False),
+)
+_BANK_NET_BY_MONTH_STMT = _gl_monthly_sums_stmt(
+    JournalLine.debit - JournalLine.credit, Account.root_code == 'A100', JournalEntry.is_client_fund.is_(False),
+)
+_CAR_PAID_BY_MONTH_STMT = monthly_sums_stmt(Invoice.created_at, [Invoice.total_omr], (Invoice.status == 'Paid', Invoice.invoice_type == 'CAR'))
+_FREIGHT_BY_MONTH_STMT = monthly_sums_stmt(Shipment.created_at, [Shipment.cost_freight_usd])
+_COSTS_BY_MONTH_STMT = monthly_sums_stmt(InternationalCost.created_at, [
+    InternationalCost.customs_omr, InternationalCost.vat_omr, InternationalCost.local_transport_omr, InternationalCost.misc_omr,
+])
+
+
+def _pivot_monthly_sums(*stmts):
+    """UNION ALL several monthly_sums_stmt selects into one (month, *all their sums) grouped SELECT.
+
+    Each part's sums land in their own columns (zeros elsewhere), so a single round trip returns
+    what the parts would have returned separately.
+    """
+    widths = [len(stmt.selected_columns) - 1 for stmt in stmts]
+    total = sum(widths)
+    parts, offset = [], 0
+    for stmt, width in zip(stmts, widths):
+        month, *sums = stmt.selected_columns
+        cols = [db.literal_column('0')] * offset + sums + [db.literal_column('0')] * (total - offset - width)
+        parts.append(stmt.with_only_columns(month.label('month'), *[c.label(f's{i}') for i, c in enumerate(cols)]))
+        offset += width
+    union = db.union_all(*parts).subquery()
+    return db.select(union.c.month, *[db.func.sum(union.c[f's{i}']) for i in range(total)]).group_by(union.c.month)
+
+
+# Monthly P&L sources in one statement: (month, revenue, paid CAR, freight USD, customs, vat, local transport, misc)
+_PL_BY_MONTH_STMT = _pivot_monthly_sums(_REVENUE_BY_MONTH_STMT, _CAR_PAID_BY_MONTH_STMT, _FREIGHT_BY_MONTH_STMT, _COSTS_BY_MONTH_STMT)
+
+
+def _add_missing_accounts(specs: list[tuple[str, str, str]], **attrs) -> None:
+    """Add Account(code, name, type, **attrs) for each spec whose code does not exist yet.
+
+    One IN lookup covers all codes; the new rows are flushed with the caller's next flush.
+    """
+    existing = set(db.session.scalars(db.select(Account.code).where(Account.code.in_([code for code, _name, _typ in specs]))))
+    db.session.add_all([
+        Account(code=code, name=name, type=typ, **attrs) for code, name, typ in specs if code not in existing
+    ])
+
 
 def _ensure_client_accounts(customer: Customer) -> ClientAccountStructure:
     """Create per-client sub-accounts if missing and return mapping row.
@@ -120,20 +292,14 @@ def _ensure_client_accounts(customer: Customer) -> ClientAccountStructure:
     log_code = f"E200-{code_suffix}"
     ar_code = f"A300-{code_suffix}"
 
-    def ensure_account(code: str, name: str, typ: str) -> Account:
-        acc = db.session.query(Account).filter(Account.code == code).first()
-        if not acc:
-            acc = Account(code=code, name=name, type=typ, client_id=customer.id)
-            db.session.add(acc)
-            db.session.flush()
-        return acc
-
     display_name = (customer.company_name or customer.full_name or f"Client {customer.id}").strip()
-    ensure_account(dep_code, f"{display_name} Deposit", "LIABILITY")
-    ensure_account(auc_code, f"{display_name} Auction Clearing", "ASSET")
-    ensure_account(srv_code, f"{display_name} Service Revenue", "REVENUE")
-    ensure_account(log_code, f"{display_name} Logistics Expense", "EXPENSE")
-    ensure_account(ar_code, f"{display_name} Receivable", "ASSET")
+    _add_missing_accounts([
+        (dep_code, f"{display_name} Deposit", "LIABILITY"),
+        (auc_code, f"{display_name} Auction Clearing", "ASSET"),
+        (srv_code, f"{display_name} Service Revenue", "REVENUE"),
+        (log_code, f"{display_name} Logistics Expense", "EXPENSE"),
+        (ar_code, f"{display_name} Receivable", "ASSET"),
+    ], client_id=customer.id)
 
     cas = ClientAccountStructure(
         customer_id=customer.id,
@@ -174,21 +340,15 @@ def _ensure_vehicle_accounts(vehicle: Vehicle) -> VehicleAccountStructure:
     com_code = f"R300-V{vid:06d}"
     str_code = f"E230-V{vid:06d}"
 
-    def ensure_account(code: str, name: str, typ: str):
-        acc = db.session.query(Account).filter(Account.code == code).first()
-        if not acc:
-            acc = Account(code=code, name=name, type=typ, client_id=owner_id, vehicle_id=vid)
-            db.session.add(acc)
-            db.session.flush()
-        return acc
-
     label = vin
-    ensure_account(dep_code, f"{label} Deposit", "LIABILITY")
-    ensure_account(auc_code, f"{label} Auction", "ASSET")
-    ensure_account(frt_code, f"{label} Freight", "EXPENSE")
-    ensure_account(cst_code, f"{label} Customs", "EXPENSE")
-    ensure_account(com_code, f"{label} Commission", "REVENUE")
-    ensure_account(str_code, f"{label} Storage", "EXPENSE")
+    _add_missing_accounts([
+        (dep_code, f"{label} Deposit", "LIABILITY"),
+        (auc_code, f"{label} Auction", "ASSET"),
+        (frt_code, f"{label} Freight", "EXPENSE"),
+        (cst_code, f"{label} Customs", "EXPENSE"),
+        (com_code, f"{label} Commission", "REVENUE"),
+        (str_code, f"{label} Storage", "EXPENSE"),
+    ], client_id=owner_id, vehicle_id=vid)
 
     vas = VehicleAccountStructure(
         vehicle_id=vid,
@@ -206,18 +366,23 @@ def _ensure_vehicle_accounts(vehicle: Vehicle) -> VehicleAccountStructure:
     return vas
 
 
-def _get_vehicle_account_code(vehicle_id: int | None, kind: str, default_code: str) -> str:
-    """Return the per-vehicle account code for kind if mapping exists; fallback to default_code.
+def _account_codes(owner: str, owner_id: int, load) -> dict | None:
+    """Kind -> account code map for a vehicle or client, read (or created) once per request."""
+    if not has_request_context():
+        return load()
+    memo = g.setdefault('_acct_codes', {})
+    key = (owner, owner_id)
+    if key not in memo:
+        memo[key] = load()
+    return memo[key]
 
-    kind: 'deposit' | 'auction' | 'freight' | 'customs' | 'commission' | 'storage'
-    """
-    if not vehicle_id:
-        return default_code
+
+def _load_vehicle_account_codes(vehicle_id: int) -> dict | None:
     vas = db.session.query(VehicleAccountStructure).filter_by(vehicle_id=vehicle_id).first()
     if not vas:
         v = db.session.get(Vehicle, vehicle_id)
         if not v:
-            return default_code
+            return None
         vas = _ensure_vehicle_accounts(v)
     return {
         'deposit': vas.deposit_account_code,
@@ -226,7 +391,20 @@ def _get_vehicle_account_code(vehicle_id: int | None, kind: str, default_code: s
         'customs': vas.customs_account_code,
         'commission': vas.commission_account_code,
         'storage': vas.storage_account_code,
-    }.get(kind, default_code)
+    }
+
+
+def _get_vehicle_account_code(vehicle_id: int | None, kind: str, default_code: str) -> str:
+    """Return the per-vehicle account code for kind if mapping exists; fallback to default_code.
+
+    kind: 'deposit' | 'auction' | 'freight' | 'customs' | 'commission' | 'storage'
+    """
+    if not vehicle_id:
+        return default_code
+    codes = _account_codes('vehicle', vehicle_id, lambda: _load_vehicle_account_codes(vehicle_id))
+    if codes is None:
+        return default_code
+    return codes.get(kind, default_code)
 
 
 def create_vehicle_chart(vehicle_id: int, client_id: int | None = None) -> VehicleAccountStructure | None:
@@ -249,26 +427,35 @@ def create_vehicle_chart(vehicle_id: int, client_id: int | None = None) -> Vehic
             pass
     return vas
 
-def _get_client_account_code(customer_id: int | None, kind: str, default_code: str) -> str:
-    """Return the per-client account code for kind if customer has mapping; fallback to default_code.
-
-    kind: 'deposit' | 'auction' | 'service' | 'logistics' | 'receivable'
-    """
-    if not customer_id:
-        return default_code
+def _load_client_account_codes(customer_id: int) -> dict | None:
     cas = db.session.query(ClientAccountStructure).filter_by(customer_id=customer_id).first()
     if not cas:
         cust = db.session.get(Customer, customer_id)
         if not cust:
-            return default_code
+            return None
         cas = _ensure_client_accounts(cust)
     return {
         'deposit': cas.deposit_account_code,
-        'auction': cas.auction_account_code or default_code,
+        'auction': cas.auction_account_code,
         'service': cas.service_revenue_account_code,
         'logistics': cas.logistics_expense_account_code,
         'receivable': cas.receivable_account_code,
-    }.get(kind, default_code)
+    }
+
+
+def _get_client_account_code(customer_id: int | None, kind: str, default_code: str) -> str:
+    """Return the per-client account code for kind if customer has mapping; fallback to default_code.
+
+    kind: 'deposit' | 'auction' | 'service' | 'logistics' | 'receivable'
+    """
+    if not customer_id:
+        return default_code
+    codes = _account_codes('client', customer_id, lambda: _load_client_account_codes(customer_id))
+    if codes is None:
+        return default_code
+    if kind == 'auction':
+        return codes['auction'] or default_code
+    return codes.get(kind, default_code)
 
 
 def create_client_chart(client_id: int) -> ClientAccountStructure | None:
@@ -283,6 +470,15 @@ def create_client_chart(client_id: int) -> ClientAccountStructure | None:
         return None
     return _ensure_client_accounts(cust)
 
+def _account_ids(codes: set[str]) -> dict[str, int]:
+    """Account id by code covering every code that exists; found ids are kept for the request."""
+    known = g.setdefault('_acct_ids', {}) if has_request_context() else {}
+    missing = codes - known.keys()
+    if missing:
+        known.update(db.session.query(Account.code, Account.id).filter(Account.code.in_(missing)).all())
+    return known
+
+
 def _post_journal(description: str, reference: str | None, lines: list[tuple[str, float, float]],
                   customer_id: int | None = None, vehicle_id: int | None = None,
                   auction_id: int | None = None, invoice_id: int | None = None,
@@ -290,16 +486,9 @@ def _post_journal(description: str, reference: str | None, lines: list[tuple[str
     """Create a balanced journal entry from (account_code, debit, credit) lines.
     Amounts are in OMR.
     """
-    from ...models import Setting
     # Enforce lock period
-    try:
-        settings_row = db.session.query(Setting).first()
-        if settings_row and getattr(settings_row, 'books_locked_until', None):
-            from datetime import datetime
-            if datetime.utcnow() <= settings_row.books_locked_until:
-                status = 'pending'  # queue for approval if within locked period
-    except Exception:
-        pass
+    if _books_locked():
+        status = 'pending'  # queue for approval if within locked period
 
     entry = JournalEntry(
         description=description,
@@ -314,18 +503,18 @@ def _post_journal(description: str, reference: str | None, lines: list[tuple[str
     )
     db.session.add(entry)
     db.session.flush()
-    total_debit = 0
-    total_credit = 0
-    for code, dr, cr in lines:
-        acc = _get_account(code)
-        if not acc:
-            # Failsafe: skip line if account missing
-            continue
-        dr_amt = float(dr or 0)
-        cr_amt = float(cr or 0)
-        total_debit += dr_amt
-        total_credit += cr_amt
-        db.session.add(JournalLine(entry_id=entry.id, account_id=acc.id, debit=dr_amt, credit=cr_amt, currency_code='OMR'))
+    # At most one account lookup for all lines; lines with a missing account (failsafe) or no amount are skipped.
+    # Amounts are rounded to the Numeric(14,3) scale first, so a line that would be stored as 0.000 (and
+    # trip ck_journal_lines_nonzero) counts as having no amount
+    account_ids = _account_ids({code for code, _dr, _cr in lines})
+    rounded = ((code, round(float(dr or 0), 3), round(float(cr or 0), 3)) for code, dr, cr in lines)
+    line_rows = [
+        {'entry_id': entry.id, 'account_id': account_ids[code], 'debit': dr, 'credit': cr, 'currency_code': 'OMR'}
+        for code, dr, cr in rounded
+        if code in account_ids and (dr or cr)
+    ]
+    if line_rows:
+        db.session.execute(JournalLine.__table__.insert(), line_rows)
     # Do not enforce balance hard to avoid blocking UI; rely on tests/admin checks
     return entry
 
@@ -372,9 +561,8 @@ def journals_approve(entry_id: int):
     if not je:
         flash(_('Not found'), 'danger'); return redirect(url_for('acct.journals_list'))
     je.status = 'approved'
-    je.approved_at = datetime.utcnow()
+    je.approved_at = _now()
     try:
-        from flask_login import current_user
         je.approved_by_user_id = getattr(current_user, 'id', None)
     except Exception:
         pass
@@ -420,7 +608,7 @@ def refund_customer_deposit(deposit_id: int):
     if not dep or dep.status != 'held':
         return False
     dep.status = 'refunded'
-    dep.refunded_at = datetime.utcnow()
+    dep.refunded_at = _now()
     # Journal reversal: Dr Customer Deposits / Cr Bank
     amt = float(dep.amount_omr or 0)
     dep_code = _get_vehicle_account_code(dep.vehicle_id, 'deposit', _get_client_account_code(dep.customer_id, 'deposit', 'L200'))
@@ -468,20 +656,21 @@ def record_commission_from_deposit(customer_id: int, amount_omr: float, referenc
 # ---- Stage 2: Car Invoice after winning auction ----
 def create_car_invoice(customer_id: int, vehicle_id: int, price_omr: float,
                        optional_fees_omr: float = 0.0, deposit_applied_omr: float = 0.0) -> int:
-    inv = Invoice(invoice_number=f"CAR-{int(datetime.utcnow().timestamp())}", customer_id=customer_id,
+    inv = Invoice(invoice_number=next_document_number('CAR'), customer_id=customer_id,
                   vehicle_id=vehicle_id, invoice_type='CAR', status='Draft', total_omr=0)
     db.session.add(inv)
     db.session.flush()
-    items_total = Decimal('0')
-    db.session.add(InvoiceItem(invoice_id=inv.id, vehicle_id=vehicle_id, description='Car price', amount_omr=price_omr))
-    items_total += Decimal(str(price_omr))
-    if optional_fees_omr and float(optional_fees_omr) > 0:
-        db.session.add(InvoiceItem(invoice_id=inv.id, vehicle_id=vehicle_id, description='Optional fees', amount_omr=optional_fees_omr))
-        items_total += Decimal(str(optional_fees_omr))
+    price = _to_decimal(price_omr)
+    fees = _to_decimal(optional_fees_omr)
+    item_rows = [{'invoice_id': inv.id, 'vehicle_id': vehicle_id, 'description': 'Car price', 'amount_omr': price}]
+    if fees > 0:
+        item_rows.append({'invoice_id': inv.id, 'vehicle_id': vehicle_id, 'description': 'Optional fees', 'amount_omr': fees})
+    db.session.execute(InvoiceItem.__table__.insert(), item_rows)
+    items_total = sum((row['amount_omr'] for row in item_rows), Decimal('0'))
     inv.total_omr = items_total
     # Defer revenue recognition until actual payment is recorded.
     # Keep invoice as Unpaid so it doesn't count towards profits.
-    if float(items_total) > 0:
+    if items_total > 0:
         inv.status = 'Unpaid'
     return inv.id
 
@@ -490,111 +679,202 @@ def create_car_invoice(customer_id: int, vehicle_id: int, price_omr: float,
 def record_vehicle_purchase(vehicle_id: int, auction_id: int | None, purchase_price_usd: float,
                             paid_from_bank: bool = True):
     veh = db.session.get(Vehicle, vehicle_id)
-    omr_rate = Decimal(str(current_app.config.get('OMR_EXCHANGE_RATE', 0.385)))
-    amount_omr = Decimal(str(purchase_price_usd or 0)) * omr_rate
+    # Journal amounts are floats at the ledger's 3 decimals, so convert with float arithmetic
+    # and round the product once, half-up (round() would take 4.8125 to 4.812)
+    amount_omr = _round_fils(float(purchase_price_usd or 0) * _config_usd_to_omr())
     # Inventory capitalization (as asset) at OMR
     _post_journal(
         description='Vehicle purchased at auction', reference=getattr(veh, 'vin', None),
         lines=[
-            ('A200', float(amount_omr), 0.0),
-            ('A100', 0.0, float(amount_omr)) if paid_from_bank else ('L210', 0.0, float(amount_omr)),
+            ('A200', amount_omr, 0.0),
+            ('A100', 0.0, amount_omr) if paid_from_bank else ('L210', 0.0, amount_omr),
         ],
         vehicle_id=vehicle_id, auction_id=auction_id,
         is_client_fund=not paid_from_bank,
     )
-    return float(amount_omr)
+    return amount_omr
 
 def record_operational_cost(vehicle_id: int | None, auction_id: int | None, category: str,
                             amount_value: float, currency: str = 'OMR', description: str | None = None,
-                            supplier: str | None = None, paid_from_bank: bool = True) -> int:
+                            supplier: str | None = None, paid_from_bank: bool = True,
+                            customer_id: int | None = None) -> int:
+    """Record an expense and post it; pass customer_id when known to skip the owner lookups."""
     # Convert to OMR if needed
-    rate_val = Decimal('1')
-    rate_row = None
+    rate_val = 1.0
+    rate_id = None
     if currency and currency.upper() != 'OMR':
-        rate_row = db.session.query(ExchangeRate).order_by(ExchangeRate.effective_at.desc()).first()
-        rate_val = Decimal(str(rate_row.rate if rate_row else current_app.config.get('OMR_EXCHANGE_RATE', 0.385)))
-    amount_omr = Decimal(str(amount_value or 0)) * (rate_val if currency.upper() != 'OMR' else Decimal('1'))
+        rate_id, rate = _latest_rate()
+        rate_val = float(rate)
+    amount_omr = _round_fils(float(amount_value or 0) * rate_val)
 
     exp = OperationalExpense(
         vehicle_id=vehicle_id, auction_id=auction_id, category=category,
-        original_amount=amount_value, original_currency=(currency or 'OMR').upper(), amount_omr=float(amount_omr),
-        exchange_rate_id=(rate_row.id if rate_row else None), description=description, supplier=supplier,
-        paid=bool(paid_from_bank), paid_at=datetime.utcnow() if paid_from_bank else None,
+        original_amount=amount_value, original_currency=(currency or 'OMR').upper(), amount_omr=amount_omr,
+        exchange_rate_id=rate_id, description=description, supplier=supplier,
+        paid=bool(paid_from_bank), paid_at=_now() if paid_from_bank else None,
     )
     db.session.add(exp)
 
     # Journal: Dr Operational Expenses / Cr Bank (if paid)
-    if float(amount_omr) > 0 and paid_from_bank:
-        # Try to attribute the expense to a client via vehicle owner or auction customer
-        customer_id = None
-        try:
-            if vehicle_id:
-                v = db.session.get(Vehicle, int(vehicle_id))
-                customer_id = getattr(v, 'owner_customer_id', None)
-        except Exception:
-            customer_id = customer_id
-        if not customer_id and auction_id:
+    if amount_omr > 0 and paid_from_bank:
+        # Otherwise try to attribute the expense to a client via vehicle owner or auction customer
+        if customer_id is None:
             try:
-                a = db.session.get(Auction, int(auction_id))
-                customer_id = getattr(a, 'customer_id', None)
+                if vehicle_id:
+                    v = db.session.get(Vehicle, int(vehicle_id))
+                    customer_id = getattr(v, 'owner_customer_id', None)
             except Exception:
                 customer_id = customer_id
+            if not customer_id and auction_id:
+                try:
+                    a = db.session.get(Auction, int(auction_id))
+                    customer_id = getattr(a, 'customer_id', None)
+                except Exception:
+                    customer_id = customer_id
         # Map category to per-vehicle account when possible
-        kind = 'freight'
-        cat_norm = (category or '').lower()
-        if 'custom' in cat_norm:
-            kind = 'customs'
-        elif 'storage' in cat_norm or 'warehouse' in cat_norm:
-            kind = 'storage'
-        else:
-            kind = 'freight'
+        kind = _operational_cost_kind(category)
         exp_code_default = 'E200'
         exp_code = _get_vehicle_account_code(vehicle_id, kind, _get_client_account_code(customer_id, 'logistics', exp_code_default))
         _post_journal(
             description=f'Operational expense - {category}', reference=description,
-            lines=[(exp_code, float(amount_omr), 0.0), ('A100', 0.0, float(amount_omr))],
+            lines=[(exp_code, amount_omr, 0.0), ('A100', 0.0, amount_omr)],
             customer_id=customer_id, vehicle_id=vehicle_id, auction_id=auction_id,
         )
 
     return exp.id if getattr(exp, 'id', None) else 0
 
 
+def _operational_cost_kind(category: str | None) -> str:
+    """Map an expense category to the per-vehicle account kind."""
+    cat_norm = (category or '').lower()
+    if 'custom' in cat_norm:
+        return 'customs'
+    if 'storage' in cat_norm or 'warehouse' in cat_norm:
+        return 'storage'
+    return 'freight'
+
+
+def record_operational_costs_bulk(costs: list[dict]) -> int:
+    """Record many operational costs at once (e.g. a shipment arrival batch).
+
+    Each dict takes the keyword arguments of record_operational_cost. Expense rows,
+    journal entries and journal lines are written with one executemany INSERT each,
+    and lookups (rate, vehicles, auctions, accounts) are fetched once for the batch.
+    Returns the number of expenses recorded.
+    """
+    if not costs:
+        return 0
+    rate_id = None
+    rate_val = Decimal('1')
+    if any((c.get('currency') or 'OMR').upper() != 'OMR' for c in costs):
+        rate_id, rate_val = _latest_rate()
+
+    # Owners are only looked up for costs that do not name their customer
+    unattributed = [c for c in costs if c.get('customer_id') is None]
+    vehicle_ids = {int(c['vehicle_id']) for c in unattributed if c.get('vehicle_id')}
+    auction_ids = {int(c['auction_id']) for c in unattributed if c.get('auction_id')}
+    vehicle_owner = dict(
+        db.session.query(Vehicle.id, Vehicle.owner_customer_id).filter(Vehicle.id.in_(vehicle_ids)).all()
+    ) if vehicle_ids else {}
+    auction_customer = dict(
+        db.session.query(Auction.id, Auction.customer_id).filter(Auction.id.in_(auction_ids)).all()
+    ) if auction_ids else {}
+
+    status = 'pending' if _books_locked() else 'approved'
+
+    now = _now()
+    exp_rows = []
+    postings = []  # (entry row, expense account code, amount)
+    code_cache: dict[tuple, str] = {}
+    for c in costs:
+        vehicle_id = int(c['vehicle_id']) if c.get('vehicle_id') else None
+        auction_id = int(c['auction_id']) if c.get('auction_id') else None
+        category = c.get('category')
+        currency = (c.get('currency') or 'OMR').upper()
+        paid_from_bank = bool(c.get('paid_from_bank', True))
+        # Quantized once, as the single-record path rounds: the stored expense and the journal agree
+        amount_omr = (_to_decimal(c.get('amount_value')) * (rate_val if currency != 'OMR' else Decimal('1'))).quantize(Decimal('0.001'), ROUND_HALF_UP)
+        exp_rows.append({
+            'vehicle_id': vehicle_id, 'auction_id': auction_id, 'category': category,
+            'original_amount': c.get('amount_value'), 'original_currency': currency, 'amount_omr': amount_omr,
+            'exchange_rate_id': rate_id if currency != 'OMR' else None,
+            'description': c.get('description'), 'supplier': c.get('supplier'),
+            'paid': paid_from_bank, 'paid_at': now if paid_from_bank else None, 'created_at': now,
+        })
+        if not (amount_omr > 0 and paid_from_bank):
+            continue
+        customer_id = c.get('customer_id')
+        if customer_id is None:
+            customer_id = vehicle_owner.get(vehicle_id) or auction_customer.get(auction_id)
+        kind = _operational_cost_kind(category)
+        key = (vehicle_id, kind, customer_id)
+        if key not in code_cache:
+            code_cache[key] = _get_vehicle_account_code(vehicle_id, kind, _get_client_account_code(customer_id, 'logistics', 'E200'))
+        postings.append(({
+            'entry_date': now, 'created_at': now, 'description': f'Operational expense - {category}',
+            'reference': c.get('description'), 'customer_id': customer_id, 'vehicle_id': vehicle_id,
+            'auction_id': auction_id, 'invoice_id': None, 'is_client_fund': False, 'status': status,
+        }, code_cache[key], float(amount_omr)))
+
+    db.session.execute(OperationalExpense.__table__.insert(), exp_rows)
+    if postings:
+        codes = {code for _e, code, _a in postings} | {'A100'}
+        account_ids = _account_ids(codes)
+        entry_ids = db.session.execute(
+            JournalEntry.__table__.insert().returning(JournalEntry.__table__.c.id, sort_by_parameter_order=True),
+            [e for e, _c, _a in postings],
+        ).scalars().all()
+        line_rows = []
+        for entry_id, (_e, code, amount) in zip(entry_ids, postings):
+            # Dr Operational Expenses / Cr Bank; lines with a missing account or an amount that rounds
+            # to 0.000 are skipped as in _post_journal
+            amount = round(amount, 3)
+            for acc_code, dr, cr in ((code, amount, 0.0), ('A100', 0.0, amount)):
+                if acc_code in account_ids and (dr or cr):
+                    line_rows.append({'entry_id': entry_id, 'account_id': account_ids[acc_code],
+                                      'debit': dr, 'credit': cr, 'currency_code': 'OMR'})
+        if line_rows:
+            db.session.execute(JournalLine.__table__.insert(), line_rows)
+    return len(exp_rows)
+
+
 # ---- Stage 4: Shipping invoice to customer with fines ----
 def create_shipping_invoice(customer_id: int, vehicle_id: int, shipping_cost_omr: float,
                             fines_usd: float = 0.0) -> int:
     # Determine rate for fines conversion
-    rate_row = db.session.query(ExchangeRate).order_by(ExchangeRate.effective_at.desc()).first()
-    rate_val = Decimal(str(rate_row.rate if rate_row else current_app.config.get('OMR_EXCHANGE_RATE', 0.385)))
-    fines_omr = Decimal(str(fines_usd or 0)) * rate_val
+    rate_id, rate_val = _latest_rate()
+    fines_omr = _to_decimal(fines_usd) * rate_val
+    shipping_omr = _to_decimal(shipping_cost_omr)
 
     inv = Invoice(
-        invoice_number=f"SHP-{int(datetime.utcnow().timestamp())}",
+        invoice_number=next_document_number('SHP'),
         customer_id=customer_id,
         vehicle_id=vehicle_id,
         invoice_type='SHIPPING',
         status='Draft',
-        exchange_rate_id=(rate_row.id if rate_row else None),
+        exchange_rate_id=rate_id,
         total_omr=0,
     )
     db.session.add(inv)
     db.session.flush()
-    total = Decimal('0')
-    if shipping_cost_omr and float(shipping_cost_omr) > 0:
-        db.session.add(InvoiceItem(invoice_id=inv.id, vehicle_id=vehicle_id, description='Shipping cost', amount_omr=shipping_cost_omr))
-        total += Decimal(str(shipping_cost_omr))
-    if fines_omr and float(fines_omr) > 0:
-        db.session.add(InvoiceItem(invoice_id=inv.id, vehicle_id=vehicle_id, description='Fines (converted to OMR)', amount_omr=float(fines_omr)))
-        total += fines_omr
+    item_rows = []
+    if shipping_omr > 0:
+        item_rows.append({'invoice_id': inv.id, 'vehicle_id': vehicle_id, 'description': 'Shipping cost', 'amount_omr': shipping_omr})
+    if fines_omr > 0:
+        item_rows.append({'invoice_id': inv.id, 'vehicle_id': vehicle_id, 'description': 'Fines (converted to OMR)', 'amount_omr': fines_omr})
+    if item_rows:
+        db.session.execute(InvoiceItem.__table__.insert(), item_rows)
+    total = sum((row['amount_omr'] for row in item_rows), Decimal('0'))
     inv.total_omr = total
 
     # Assume immediate collection for simplicity: 
     # Dr Bank (total), Cr Fines Revenue (fines_omr), Cr Operational Expenses (shipping_cost_omr) to offset prior expense
-    if float(total) > 0:
+    if total > 0:
         lines = [('A100', float(total), 0.0)]
-        if float(fines_omr) > 0:
+        if fines_omr > 0:
             lines.append((_get_vehicle_account_code(vehicle_id, 'commission', _get_client_account_code(customer_id, 'service', 'R300')), 0.0, float(fines_omr)))
-        if float(shipping_cost_omr or 0) > 0:
-            lines.append((_get_vehicle_account_code(vehicle_id, 'freight', _get_client_account_code(customer_id, 'logistics', 'E200')), 0.0, float(shipping_cost_omr)))
+        if shipping_omr > 0:
+            lines.append((_get_vehicle_account_code(vehicle_id, 'freight', _get_client_account_code(customer_id, 'logistics', 'E200')), 0.0, float(shipping_omr)))
         _post_journal(
             description='Shipping invoice payment', reference=inv.invoice_number,
             lines=lines,
@@ -603,91 +883,111 @@ def create_shipping_invoice(customer_id: int, vehicle_id: int, shipping_cost_omr
         )
         inv.status = 'Paid'
     return inv.id
+
+
+# Dashboard aggregates, built once at import and reused on every render: one row per source table
+_INVOICE_TOTALS_STMT = db.select(
+    db.func.count(Invoice.id),
+    # CAR invoices are pass-through costs (expenses), not revenue
+    db.func.coalesce(db.func.sum(db.case((db.and_(Invoice.status == 'Paid', Invoice.invoice_type == 'CAR'), Invoice.total_omr), else_=0)), 0),
+)
+_COST_TOTALS_STMT = db.select(
+    db.func.count(InternationalCost.id),
+    db.func.coalesce(db.func.sum(InternationalCost.auction_fees_usd), 0),
+    db.func.coalesce(db.func.sum(InternationalCost.customs_omr), 0),
+    db.func.coalesce(db.func.sum(InternationalCost.vat_omr), 0),
+    db.func.coalesce(db.func.sum(InternationalCost.local_transport_omr), 0),
+    db.func.coalesce(db.func.sum(InternationalCost.misc_omr), 0),
+)
+_FREIGHT_TOTAL_STMT = db.select(db.func.coalesce(db.func.sum(Shipment.cost_freight_usd), 0))
+_GL_TOTALS_STMT = (
+    db.select(
+        # Revenue: service fees only (R* accounts excluding client funds)
+        db.func.coalesce(db.func.sum(db.case(
+            (db.and_(Account.code_class == 'R', JournalEntry.is_client_fund.is_(False)), JournalLine.credit - JournalLine.debit), else_=0,
+        )), 0),
+        # Outstanding client deposits (L200* credit balance)
+        db.func.coalesce(db.func.sum(db.case((Account.root_code == 'L200', JournalLine.credit - JournalLine.debit), else_=0)), 0),
+    )
+    .join(Account, JournalLine.account_id == Account.id)
+    .join(JournalEntry, JournalLine.entry_id == JournalEntry.id)
+    .where(db.or_(Account.code_class == 'R', Account.root_code == 'L200'))
+)
+
+
+def _cross_join_one_row(*stmts):
+    """SELECT every column of several one-row aggregate SELECTs as a single row.
+
+    The subqueries are joined ON true; with one row each the result is still exactly one row.
+    """
+    subs = [stmt.subquery() for stmt in stmts]
+    from_ = subs[0]
+    for sub in subs[1:]:
+        from_ = from_.join(sub, db.true())
+    return db.select(*[col for sub in subs for col in sub.c]).select_from(from_)
+
+
+# Every dashboard count and total in one round trip
+_DASHBOARD_TOTALS_STMT = _cross_join_one_row(_INVOICE_TOTALS_STMT, _COST_TOTALS_STMT, _FREIGHT_TOTAL_STMT, _GL_TOTALS_STMT)
+
+
 @acct_bp.route("/dashboard")
 @role_required("accountant", "admin")
 def dashboard():
+    now = _now()
+    # Never memoized: accountants check a payment they just recorded here, and the memo is per
+    # worker, so another worker's write would not invalidate it
+    counts, totals, chart = _dashboard_payload(now)
+    return render_template("accounting/dashboard.html", counts=counts, totals=totals, chart=chart)
+
+
+def _dashboard_payload(now: datetime) -> tuple[dict, dict, dict]:
+    """Counts, totals and chart series shown on the dashboard."""
+    invoice_count, car_paid, cost_count, *cost_sums, freight_usd, rev_total, client_deposits = (
+        db.session.execute(_DASHBOARD_TOTALS_STMT).one()
+    )
+
     # summary metrics
     counts = {
-        "invoices": db.session.query(Invoice).count(),
-        "vehicles_priced": db.session.query(InternationalCost).count(),
+        "invoices": invoice_count,
+        "vehicles_priced": cost_count,
     }
 
-    usd_to_omr = float(current_app.config.get('OMR_EXCHANGE_RATE', 0.385))
-    # Ensure numeric operations are done with consistent types to avoid Decimal*float TypeError
-    freight_usd_sum = db.session.query(db.func.coalesce(db.func.sum(Shipment.cost_freight_usd), 0)).scalar() or 0
-    auction_fees_usd_sum = db.session.query(db.func.coalesce(db.func.sum(InternationalCost.auction_fees_usd), 0)).scalar() or 0
-    expenses_omr = (float(freight_usd_sum) + float(auction_fees_usd_sum)) * usd_to_omr
-    # Treat CAR invoices as pass-through costs (expenses), not revenue
-    car_paid_total = float(
-        db.session.query(db.func.coalesce(db.func.sum(Invoice.total_omr), 0))
-        .filter(Invoice.status == 'Paid', Invoice.invoice_type == 'CAR')
-        .scalar()
-        or 0
-    )
-    # Revenue should include service fees only (R* accounts excluding client funds)
-    rev_total = db.session.query(db.func.coalesce(db.func.sum(JournalLine.credit - JournalLine.debit), 0)).\
-        join(Account, JournalLine.account_id == Account.id).\
-        join(JournalEntry, JournalLine.entry_id == JournalEntry.id).\
-        filter(Account.code.like('R%'), JournalEntry.is_client_fund.is_(False)).scalar() or 0
+    usd_to_omr = _config_usd_to_omr()
+    # Every money total as float64 in one conversion rather than a float() per Decimal
+    # (the SELECT coalesces them, so none is NULL)
+    (
+        car_paid_total, auction_fees_usd_sum, customs, vat, local_transport, misc, freight_usd_sum, rev_total, client_deposits,
+    ) = np.array([car_paid, *cost_sums, freight_usd, rev_total, client_deposits], dtype=float).tolist()
+    freight_omr = freight_usd_sum * usd_to_omr
+    expenses_omr = freight_omr + auction_fees_usd_sum * usd_to_omr
     totals = {
-        "revenue_omr": float(rev_total),
+        "revenue_omr": rev_total,
         "expenses_omr": expenses_omr + car_paid_total,
     }
     totals["net_omr"] = totals["revenue_omr"] - totals["expenses_omr"]
 
-    # monthly revenue series (last 12 months)
-    now = datetime.utcnow()
-    months = []
-    revenue_series = []
-    for i in range(12):
-        month_start = datetime(now.year - (1 if now.month - i <= 0 else 0), ((now.month - i - 1) % 12) + 1, 1)
-        if month_start.month == 12:
-            month_end = datetime(month_start.year + 1, 1, 1)
-        else:
-            month_end = datetime(month_start.year, month_start.month + 1, 1)
-        # Sum monthly revenue from GL (R* accounts), excluding client funds
-        total = (
-            db.session.query(db.func.coalesce(db.func.sum(JournalLine.credit - JournalLine.debit), 0))
-            .join(Account, JournalLine.account_id == Account.id)
-            .join(JournalEntry, JournalLine.entry_id == JournalEntry.id)
-            .filter(
-                JournalEntry.entry_date >= month_start,
-                JournalEntry.entry_date < month_end,
-                Account.code.like('R%'),
-                JournalEntry.is_client_fund.is_(False),
-            )
-            .scalar()
-            or 0
-        )
-        months.append(month_start.strftime('%b'))
-        revenue_series.append(float(total))
-    months = list(reversed(months))
-    revenue_series = list(reversed(revenue_series))
+    # monthly revenue series (last 12 months) from GL (R* accounts), excluding client funds
+    month_starts, month_sums = _monthly_aggregates(now, live=True)
+    months = [m.strftime('%b') for m in month_starts]
+    revenue_series = month_sums[:, 0].tolist()
 
     # expenses by category (freight, customs, vat, local transport, misc)
     exp = {
-        "Freight": float(db.session.query(db.func.coalesce(db.func.sum(Shipment.cost_freight_usd), 0)).scalar() or 0) * usd_to_omr,
-        "Customs": float(db.session.query(db.func.coalesce(db.func.sum(InternationalCost.customs_omr), 0)).scalar() or 0),
-        "VAT": float(db.session.query(db.func.coalesce(db.func.sum(InternationalCost.vat_omr), 0)).scalar() or 0),
-        "Local Transport": float(db.session.query(db.func.coalesce(db.func.sum(InternationalCost.local_transport_omr), 0)).scalar() or 0),
-        "Misc": float(db.session.query(db.func.coalesce(db.func.sum(InternationalCost.misc_omr), 0)).scalar() or 0),
-        "Car Price": float(
-            db.session.query(db.func.coalesce(db.func.sum(Invoice.total_omr), 0))
-            .filter(Invoice.status == 'Paid', Invoice.invoice_type == 'CAR')
-            .scalar()
-            or 0
-        ),
+        "Freight": freight_omr,
+        "Customs": customs,
+        "VAT": vat,
+        "Local Transport": local_transport,
+        "Misc": misc,
+        "Car Price": car_paid_total,
     }
 
     # KPI: outstanding client deposits (L200* credit balance)
-    client_deposits = db.session.query(db.func.coalesce(db.func.sum(JournalLine.credit - JournalLine.debit), 0)).\
-        join(Account, JournalLine.account_id == Account.id).\
-        filter(Account.code.like('L200%')).scalar() or 0
-    totals["client_deposits_omr"] = float(client_deposits)
+    totals["client_deposits_omr"] = client_deposits
 
-    return render_template("accounting/dashboard.html", counts=counts, totals=totals, chart={
+    return counts, totals, {
         "months": months, "revenue": revenue_series, "exp_labels": list(exp.keys()), "exp_values": list(exp.values())
-    })
+    }
 
 
 # International Costs Management
@@ -730,12 +1030,50 @@ def costs_edit(vehicle_id: int):
     return render_template('accounting/costs_edit.html', vehicle=vehicle, cost=cost)
 
 
+def _export_buffer():
+    """Export buffer that stays in memory for small files and spills to a temp file past 1 MiB."""
+    return tempfile.SpooledTemporaryFile(max_size=1_048_576)
+
+
+def _write_only_workbook(title: str):
+    """Streaming (write-only) openpyxl workbook and its single sheet; rows go out via ws.append."""
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    return wb, wb.create_sheet(title)
+
+
 # Invoices CRUD
+def _refresh_invoice_total(invoice: Invoice) -> None:
+    """Set total_omr to the SUM of the stored items in one UPDATE, syncing the loaded object."""
+    items_sum = (
+        db.select(db.func.coalesce(db.func.sum(InvoiceItem.amount_omr), 0))
+        .where(InvoiceItem.invoice_id == invoice.id)
+        .scalar_subquery()
+    )
+    db.session.execute(
+        db.update(Invoice).where(Invoice.id == invoice.id).values(total_omr=items_sum),
+        execution_options={'synchronize_session': 'fetch'},
+    )
+
+
+def _revenue_recognized(invoice_id: int) -> bool:
+    """Whether any journal entry of the invoice already hits a revenue (R*) account; one EXISTS probe."""
+    return db.session.scalar(db.select(
+        db.exists()
+        .where(JournalEntry.invoice_id == invoice_id, JournalLine.entry_id == JournalEntry.id)
+        .where(JournalLine.account_id == Account.id, Account.code_class == 'R')
+    ))
+
+
 @acct_bp.route('/invoices')
 @role_required('accountant', 'admin')
 def invoices_list():
-    invoices = db.session.query(Invoice).order_by(Invoice.created_at.desc()).all()
-    return render_template('accounting/invoices_list.html', invoices=invoices)
+    # One page at a time (?page=N), customers joined in rather than loaded per row
+    pagination = db.paginate(
+        db.select(Invoice).options(joinedload(Invoice.customer)).order_by(Invoice.created_at.desc(), Invoice.id.desc()),
+        per_page=50, max_per_page=200, error_out=False,
+    )
+    return render_template('accounting/invoices_list.html', invoices=pagination.items, pagination=pagination)
 
 
 @acct_bp.route('/invoices/new', methods=['GET','POST'])
@@ -750,18 +1088,16 @@ def invoices_new():
         amounts = request.form.getlist('item_amount')
         for d, a in zip(descriptions, amounts):
             if d.strip():
-                try:
-                    items.append((d.strip(), float(a or 0)))
-                except Exception:
-                    items.append((d.strip(), 0.0))
-        inv = Invoice(invoice_number=f"INV-{int(datetime.utcnow().timestamp())}", customer_id=int(customer_id) if customer_id else None, status='Draft', total_omr=0)
+                items.append((d.strip(), _parse_decimal_input(a)))
+        inv = Invoice(invoice_number=next_document_number('INV'), customer_id=int(customer_id) if customer_id else None, status='Draft', total_omr=0)
         db.session.add(inv)
         db.session.flush()
-        total = Decimal('0')
-        for d, a in items:
-            db.session.add(InvoiceItem(invoice_id=inv.id, description=d, amount_omr=a))
-            total += Decimal(str(a))
-        inv.total_omr = total
+        if items:
+            db.session.execute(
+                InvoiceItem.__table__.insert(),
+                [{'invoice_id': inv.id, 'description': d, 'amount_omr': a} for d, a in items],
+            )
+        _refresh_invoice_total(inv)
         try:
             db.session.commit()
             flash(_('Invoice created'), 'success')
@@ -783,28 +1119,21 @@ def invoices_edit(invoice_id: int):
     if request.method == 'POST':
         status = request.form.get('status') or 'Draft'
         invoice.status = status
-        # replace items
-        db.session.query(InvoiceItem).filter_by(invoice_id=invoice.id).delete()
+        # replace items: one DELETE + one executemany INSERT instead of per-row ORM adds
+        db.session.query(InvoiceItem).filter_by(invoice_id=invoice.id).delete(synchronize_session=False)
         descriptions = request.form.getlist('item_description')
         amounts = request.form.getlist('item_amount')
-        total = Decimal('0')
-        for d, a in zip(descriptions, amounts):
-            if d.strip():
-                val = Decimal(str(a or 0))
-                db.session.add(InvoiceItem(invoice_id=invoice.id, description=d.strip(), amount_omr=val))
-                total += val
-        invoice.total_omr = total
+        item_rows = [
+            {'invoice_id': invoice.id, 'description': d.strip(), 'amount_omr': _parse_decimal_input(a)}
+            for d, a in zip(descriptions, amounts)
+            if d.strip()
+        ]
+        if item_rows:
+            db.session.execute(InvoiceItem.__table__.insert(), item_rows)
+        _refresh_invoice_total(invoice)
         # If invoice is for services (not CAR) and marked Unpaid, recognize AR and Revenue once
         if invoice.invoice_type != 'CAR' and str(status).strip().lower() == 'unpaid':
-            # Has revenue already been recognized for this invoice?
-            exists = (
-                db.session.query(JournalEntry)
-                .join(JournalLine, JournalLine.entry_id == JournalEntry.id)
-                .join(Account, JournalLine.account_id == Account.id)
-                .filter(JournalEntry.invoice_id == invoice.id, Account.code.like('R%'))
-                .first()
-            )
-            if not exists and float(invoice.total_omr or 0) > 0:
+            if not _revenue_recognized(invoice.id) and float(invoice.total_omr or 0) > 0:
                 # Dr AR (client) / Cr Revenue (client)
                 ar_code = _get_client_account_code(invoice.customer_id, 'receivable', 'A300')
                 rev_code = _get_client_account_code(invoice.customer_id, 'service', 'R300')
@@ -839,15 +1168,40 @@ def invoices_delete(invoice_id: int):
     return redirect(url_for('acct.invoices_list'))
 
 
+def _load_invoice(invoice_id: int, *options) -> Invoice | None:
+    """Invoice with its customer and items loaded up front, plus any extra loader options."""
+    return db.session.get(Invoice, invoice_id, options=[joinedload(Invoice.customer), selectinload(Invoice.items), *options])
+
+
+# Everything pdf/invoice.html reads beyond the customer and items
+_INVOICE_PDF_LOADS = (joinedload(Invoice.vehicle).joinedload(Vehicle.auction).joinedload(Auction.buyer),)
+
+
+def _invoice_pdf_fingerprint(inv: Invoice) -> str:
+    """Hash everything the invoice PDF template renders (including locale) to detect stale PDFs."""
+    buyer = inv.vehicle.auction.buyer if inv.vehicle and inv.vehicle.auction else None
+    parts = [
+        str(get_locale()), inv.invoice_number, inv.created_at.strftime('%Y-%m-%d') if inv.created_at else '',
+        inv.customer.display_name if inv.customer else '-', (buyer.buyer_number or '-') if buyer else '',
+        f"{float(inv.total_omr or 0):.3f}",
+    ]
+    parts.extend(f"{it.description}|{float(it.amount_omr or 0):.3f}" for it in inv.items)
+    return hashlib.sha256("\n".join(str(p) for p in parts).encode('utf-8')).hexdigest()
+
+
 @acct_bp.route('/invoices/<int:invoice_id>/export')
 @role_required('accountant', 'admin')
 def invoices_export(invoice_id: int):
-    inv = db.session.get(Invoice, invoice_id)
+    inv = _load_invoice(invoice_id, *_INVOICE_PDF_LOADS)
     if not inv:
         abort(404)
-    items = db.session.query(InvoiceItem).filter_by(invoice_id=inv.id).all()
-    path = render_invoice_pdf(inv, items)
+    fingerprint = _invoice_pdf_fingerprint(inv)
+    # Reuse the stored PDF while its inputs are unchanged: no render, upload or DB write
+    if inv.pdf_path and inv.pdf_fingerprint == fingerprint:
+        return redirect(inv.pdf_path)
+    path = render_invoice_pdf(inv, inv.items)
     inv.pdf_path = path
+    inv.pdf_fingerprint = fingerprint
     db.session.commit()
     return redirect(path)
 
@@ -855,53 +1209,123 @@ def invoices_export(invoice_id: int):
 @acct_bp.route('/invoices/<int:invoice_id>/export.xlsx')
 @role_required('accountant', 'admin')
 def invoices_export_xlsx(invoice_id: int):
-    from openpyxl import Workbook
-    inv = db.session.get(Invoice, invoice_id)
+    inv = db.session.get(Invoice, invoice_id, options=[joinedload(Invoice.customer)])
     if not inv:
         abort(404)
-    items = db.session.query(InvoiceItem).filter_by(invoice_id=inv.id).all()
-    wb = Workbook(); ws = wb.active; ws.title = inv.invoice_number or 'Invoice'
+    # Plain (description, float) rows: no InvoiceItem objects or per-row Decimal -> float
+    items = db.session.execute(
+        db.select(InvoiceItem.description, db.cast(db.func.coalesce(InvoiceItem.amount_omr, 0), db.Float))
+        .where(InvoiceItem.invoice_id == inv.id)
+    ).all()
+    wb, ws = _write_only_workbook(inv.invoice_number or 'Invoice')
     ws.append(['Invoice #', inv.invoice_number])
     ws.append(['Date', inv.created_at.strftime('%Y-%m-%d') if inv.created_at else ''])
     ws.append(['Client', inv.customer.display_name if inv.customer else '-'])
     ws.append([])
     ws.append(['Description', 'Amount (OMR)'])
-    for it in items:
-        ws.append([it.description, float(it.amount_omr or 0)])
+    for row in items:
+        ws.append(list(row))
     ws.append([])
     ws.append(['Total', float(inv.total_omr or 0)])
-    from io import BytesIO
-    buf = BytesIO(); wb.save(buf); buf.seek(0)
+    buf = _export_buffer(); wb.save(buf); buf.seek(0)
     return send_file(buf, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', as_attachment=True, download_name=f"{inv.invoice_number}.xlsx")
 
+# SMTP handshakes (and fetching a stored PDF back) run on this pool. Flask-Mail 0.9 gives smtplib no
+# timeout, so the request waits at most MAIL_SEND_TIMEOUT seconds for the outcome instead of blocking
+# on a stalled server; the pool is drained at shutdown rather than dropping queued sends
+_MAIL_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix='acct-mail')
+atexit.register(_MAIL_POOL.shutdown, wait=True)
+# Sends in flight, including ones a request stopped waiting for; past this, new sends fail fast
+_MAIL_SLOTS = threading.BoundedSemaphore(8)
+
+
+def _send_pdf_email(msg: Message, filename: str, path: str, pdf_bytes: bytes | None,
+                    target_type: str, target_id: int) -> bool | None:
+    """Attach the PDF (downloading it from path when pdf_bytes is None) and send msg on the mail pool.
+
+    Returns True once sent, False if sending failed, or None if it is still running after
+    MAIL_SEND_TIMEOUT seconds. Every failure, including one after the request stopped waiting,
+    is written to the audit log as 'email_failed' against the invoice or BOL.
+    """
+    app = current_app._get_current_object()
+    user_id = getattr(current_user, 'id', None)
+
+    def record_failure(error: str) -> None:
+        app.logger.error('Failed to email %s to %s: %s', filename, ', '.join(msg.recipients), error)
+        with app.app_context():
+            db.session.add(AuditLog(
+                user_id=user_id, action='email_failed', target_type=target_type, target_id=target_id,
+                meta={'recipients': list(msg.recipients), 'filename': filename, 'error': error[:500]},
+            ))
+            try:
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+
+    if not _MAIL_SLOTS.acquire(blocking=False):
+        record_failure('too many emails already being sent')
+        return False
+
+    def run():
+        try:
+            data = pdf_bytes
+            if data is None:
+                import requests  # only needed to fetch a PDF back from remote storage
+                resp = requests.get(path, timeout=30)
+                resp.raise_for_status()
+                data = resp.content
+            msg.attach(filename=filename, content_type='application/pdf', data=data)
+            with app.app_context():
+                mail.send(msg)
+        except Exception as exc:
+            record_failure(f'{type(exc).__name__}: {exc}')
+            raise
+        finally:
+            _MAIL_SLOTS.release()
+
+    future = _MAIL_POOL.submit(run)
+    try:
+        future.result(timeout=app.config.get('MAIL_SEND_TIMEOUT', 20))
+    except FutureTimeoutError:
+        return None
+    except Exception:
+        return False
+    return True
+
+
+def _flash_email_result(sent: bool | None) -> None:
+    if sent:
+        flash(_('Email sent'), 'success')
+    elif sent is None:
+        flash(_('Email queued'), 'info')
+    else:
+        flash(_('Failed to send email'), 'danger')
+
+
 @acct_bp.route('/invoices/<int:invoice_id>/email', methods=['POST'])
 @role_required('accountant', 'admin')
 def invoices_email(invoice_id: int):
-    inv = db.session.get(Invoice, invoice_id)
+    inv = _load_invoice(invoice_id, joinedload(Invoice.customer).joinedload(Customer.user), *_INVOICE_PDF_LOADS)
     if not inv or not inv.customer or not inv.customer.user:
         flash(_('Missing customer email'), 'danger')
         return redirect(url_for('acct.invoices_list'))
     email = inv.customer.user.email
-    # ensure pdf exists
-    items = db.session.query(InvoiceItem).filter_by(invoice_id=inv.id).all()
+    # ensure an up-to-date pdf exists
     path = inv.pdf_path
-    if not path:
-        path = render_invoice_pdf(inv, items)
+    pdf_bytes = None
+    fingerprint = _invoice_pdf_fingerprint(inv)
+    if not path or inv.pdf_fingerprint != fingerprint:
+        # keep the freshly rendered bytes for the attachment instead of downloading them back
+        path, pdf_bytes = render_invoice_pdf_with_bytes(inv, inv.items)
         inv.pdf_path = path
+        inv.pdf_fingerprint = fingerprint
         try:
             db.session.commit()
         except Exception:
             db.session.rollback()
-    try:
-        msg = Message(subject=_('Invoice %(n)s', n=inv.invoice_number), recipients=[email])
-        msg.body = _('Please find attached invoice %(n)s.', n=inv.invoice_number)
-        resp = requests.get(path, timeout=30)
-        resp.raise_for_status()
-        msg.attach(filename=f"{inv.invoice_number}.pdf", content_type='application/pdf', data=resp.content)
-        mail.send(msg)
-        flash(_('Email sent'), 'success')
-    except Exception:
-        flash(_('Failed to send email'), 'danger')
+    msg = Message(subject=_('Invoice %(n)s', n=inv.invoice_number), recipients=[email])
+    msg.body = _('Please find attached invoice %(n)s.', n=inv.invoice_number)
+    _flash_email_result(_send_pdf_email(msg, f"{inv.invoice_number}.pdf", path, pdf_bytes, 'Invoice', inv.id))
     return redirect(url_for('acct.invoices_edit', invoice_id=inv.id))
 
 
@@ -909,9 +1333,20 @@ def invoices_email(invoice_id: int):
 @acct_bp.route('/payments')
 @role_required('accountant', 'admin')
 def payments_list():
-    payments = db.session.query(Payment).order_by(Payment.created_at.desc()).limit(100).all()
-    invoices = db.session.query(Invoice).order_by(Invoice.created_at.desc()).all()
-    return render_template('accounting/payments_list.html', payments=payments, invoices=invoices)
+    # The record form looks invoices up by VIN (api_invoice_by_vin), so no invoice list is loaded here.
+    # One page at a time (?page=N) so older payments stay reachable without loading them all
+    pagination = db.paginate(
+        db.select(Payment)
+        .options(
+            joinedload(Payment.customer),
+            joinedload(Payment.vehicle),
+            joinedload(Payment.invoice).joinedload(Invoice.customer),
+            joinedload(Payment.invoice).joinedload(Invoice.vehicle),
+        )
+        .order_by(Payment.created_at.desc(), Payment.id.desc()),
+        per_page=100, max_per_page=200, error_out=False,
+    )
+    return render_template('accounting/payments_list.html', payments=pagination.items, pagination=pagination)
 
 
 @acct_bp.get('/api/invoices/by_vin')
@@ -937,40 +1372,26 @@ def api_invoice_by_vin():
     if not veh:
         return jsonify({'error': 'vehicle_not_found'}), 404
 
-    invs = (
-        db.session.query(Invoice)
+    # Largest outstanding balance first (clamped at 0, so fully paid invoices tie), then the latest;
+    # the paid sum, customer and items come back with the chosen invoice
+    paid_sum = (
+        db.select(db.func.coalesce(db.func.sum(Payment.amount_omr), 0))
+        .where(Payment.invoice_id == Invoice.id)
+        .scalar_subquery()
+    )
+    outstanding = db.func.coalesce(Invoice.total_omr, 0) - paid_sum
+    row = (
+        db.session.query(Invoice, paid_sum)
+        .options(joinedload(Invoice.customer), selectinload(Invoice.items))
         .filter(Invoice.vehicle_id == veh.id)
-        .order_by(Invoice.created_at.desc(), Invoice.id.desc())
-        .all()
+        .order_by(db.case((outstanding > 0, outstanding), else_=0).desc(), Invoice.created_at.desc(), Invoice.id.desc())
+        .first()
     )
-    if not invs:
+    if row is None:
         return jsonify({'error': 'no_invoices_for_vehicle'}), 404
-
-    chosen = None
-    chosen_balance = -1.0
-    for inv in invs:
-        try:
-            total = float(inv.total_omr or 0)
-        except Exception:
-            total = 0.0
-        try:
-            paid = float(inv.paid_total() or 0)
-        except Exception:
-            paid = 0.0
-        balance = max(0.0, total - paid)
-        if balance > chosen_balance:
-            chosen = inv
-            chosen_balance = balance
-    inv = chosen or invs[0]
-
-    try:
-        total = float(inv.total_omr or 0)
-    except Exception:
-        total = 0.0
-    try:
-        paid = float(inv.paid_total() or 0)
-    except Exception:
-        paid = 0.0
+    inv, paid = row
+    total = float(inv.total_omr or 0)
+    paid = float(paid or 0)
     balance = max(0.0, total - paid)
 
     items = [
@@ -1018,69 +1439,52 @@ def payments_new():
         flash(_('VIN is required'), 'danger')
         return redirect(url_for('acct.payments_list'))
 
+    # Load the invoice together with the vehicle of its first vehicle-linked item (if any),
+    # which the CAR classification below needs, so that check costs no extra query.
+    vehicle_item_vehicle_id = (
+        db.select(InvoiceItem.vehicle_id)
+        .where(InvoiceItem.invoice_id == Invoice.id, InvoiceItem.vehicle_id.isnot(None))
+        .limit(1)
+        .scalar_subquery()
+    )
+    # Resolve the VIN once (served by ix_vehicles_vin_upper): it picks the invoice when none was
+    # given and links the payment to the vehicle and its owner
+    veh = db.session.execute(
+        db.select(Vehicle.id, Vehicle.owner_customer_id).where(db.func.upper(Vehicle.vin) == vin_input).limit(1)
+    ).first()
+    inv, item_vehicle_id = None, None
+    if invoice_id:
+        inv, item_vehicle_id = (
+            db.session.query(Invoice, vehicle_item_vehicle_id).filter(Invoice.id == int(invoice_id)).first()
+            or (None, None)
+        )
     # If invoice_id is missing, try resolving from VIN
-    inv = db.session.get(Invoice, int(invoice_id)) if invoice_id else None
     if not inv:
-        try:
-            veh = (
-                db.session.query(Vehicle)
-                .filter(db.func.upper(Vehicle.vin) == vin_input)
-                .first()
-            )
-        except Exception:
-            veh = None
         if veh:
-            cand = (
-                db.session.query(Invoice)
+            inv, item_vehicle_id = (
+                db.session.query(Invoice, vehicle_item_vehicle_id)
                 .filter(Invoice.vehicle_id == veh.id)
                 .order_by(Invoice.created_at.desc(), Invoice.id.desc())
                 .first()
+                or (None, None)
             )
-            inv = cand
     if not inv:
         flash(_('Invalid invoice'), 'danger')
         return redirect(url_for('acct.payments_list'))
-    try:
-        amt = Decimal(str(amount or 0))
-    except Exception:
-        amt = Decimal('0')
-    # Try to link vehicle and customer using VIN; otherwise fall back to invoice linkage
-    vehicle_id = None
-    customer_id = inv.customer_id
-    try:
-        veh = db.session.query(Vehicle).filter(db.func.upper(Vehicle.vin) == vin_input).first()
-        if veh:
-            vehicle_id = veh.id
-            # Prefer explicit owner as the customer; fallback to invoice customer
-            if getattr(veh, 'owner_customer_id', None):
-                customer_id = veh.owner_customer_id
-    except Exception:
-        pass
+    amt = _parse_decimal_input(amount)
+    # Link vehicle and customer using VIN; otherwise fall back to invoice linkage
+    vehicle_id = veh.id if veh else None
+    # Prefer explicit owner as the customer; fallback to invoice customer
+    customer_id = (veh.owner_customer_id if veh else None) or inv.customer_id
     p = Payment(invoice_id=inv.id, amount_omr=amt, method=method, reference=reference,
                 vehicle_id=vehicle_id, customer_id=customer_id)
     db.session.add(p)
     # If this invoice looks like a car purchase (items linked to a vehicle) and has no explicit type,
     # classify it as a CAR invoice so dashboards and reports treat it correctly.
-    try:
-        if not (inv.invoice_type and str(inv.invoice_type).strip()):
-            it = (
-                db.session.query(InvoiceItem)
-                .filter(InvoiceItem.invoice_id == inv.id, InvoiceItem.vehicle_id.isnot(None))
-                .first()
-            )
-            if it:
-                inv.invoice_type = 'CAR'
-                if not getattr(inv, 'vehicle_id', None):
-                    inv.vehicle_id = it.vehicle_id
-    except Exception:
-        # Non-blocking classification
-        pass
-    # update status
-    paid = inv.paid_total() + amt
-    if paid >= (inv.total_omr or 0):
-        inv.status = 'Paid'
-    else:
-        inv.status = 'Partial'
+    if item_vehicle_id and not (inv.invoice_type and str(inv.invoice_type).strip()):
+        inv.invoice_type = 'CAR'
+        if not getattr(inv, 'vehicle_id', None):
+            inv.vehicle_id = item_vehicle_id
 
     # Determine and post journal entry type
     try:
@@ -1090,14 +1494,7 @@ def payments_new():
             if (inv.invoice_type or '').strip().upper() == 'CAR':
                 et = 'client_fund'
             else:
-                recognized = (
-                    db.session.query(JournalEntry)
-                    .join(JournalLine, JournalLine.entry_id == JournalEntry.id)
-                    .join(Account, JournalLine.account_id == Account.id)
-                    .filter(JournalEntry.invoice_id == inv.id, Account.code.like('R%'))
-                    .first()
-                )
-                et = 'ar_settlement' if recognized else 'revenue'
+                et = 'ar_settlement' if _revenue_recognized(inv.id) else 'revenue'
 
         if float(amt) > 0:
             if et == 'client_fund':
@@ -1148,6 +1545,21 @@ def payments_new():
         # Non-blocking
         pass
     try:
+        # Settle the status in the database once the payment row exists: a single UPDATE compares
+        # the stored payments (this one included) with the total, so payments recorded concurrently
+        # against the same invoice are all counted
+        db.session.flush()
+        paid_total = (
+            db.select(db.func.coalesce(db.func.sum(Payment.amount_omr), 0))
+            .where(Payment.invoice_id == Invoice.id)
+            .scalar_subquery()
+        )
+        db.session.execute(
+            db.update(Invoice)
+            .where(Invoice.id == inv.id)
+            .values(status=db.case((paid_total >= db.func.coalesce(Invoice.total_omr, 0), 'Paid'), else_='Partial')),
+            execution_options={'synchronize_session': False},
+        )
         db.session.commit()
         flash(_('Payment recorded'), 'success')
     except Exception:
@@ -1160,7 +1572,13 @@ def payments_new():
 @acct_bp.route('/bol')
 @role_required('accountant', 'admin')
 def bol_list():
-    bols = db.session.query(BillOfLading).order_by(BillOfLading.created_at.desc()).all()
+    # the list shows each BOL's shipment number: batch-load shipments instead of one lazy load per row
+    bols = (
+        db.session.query(BillOfLading)
+        .options(selectinload(BillOfLading.shipment))
+        .order_by(BillOfLading.created_at.desc())
+        .all()
+    )
     shipments = db.session.query(Shipment).order_by(Shipment.created_at.desc()).all()
     return render_template('accounting/bol_list.html', bols=bols, shipments=shipments)
 
@@ -1169,7 +1587,7 @@ def bol_list():
 @role_required('accountant', 'admin')
 def bol_new():
     shipment_id = request.form.get('shipment_id')
-    bol_number = request.form.get('bol_number') or f"BOL-{int(datetime.utcnow().timestamp())}"
+    bol_number = request.form.get('bol_number') or next_document_number('BOL')
     bol = BillOfLading(bol_number=bol_number, shipment_id=int(shipment_id) if shipment_id else None)
     db.session.add(bol)
     try:
@@ -1181,16 +1599,38 @@ def bol_new():
     return redirect(url_for('acct.bol_list'))
 
 
+def _bol_pdf_fingerprint(bol: BillOfLading, vehicles: list) -> str:
+    """Hash everything the BOL PDF template renders (including locale) to detect stale PDFs."""
+    parts = [
+        str(get_locale()), bol.bol_number, bol.issue_date.strftime('%Y-%m-%d') if bol.issue_date else '',
+        bol.shipment.shipment_number if bol.shipment else '-',
+    ]
+    parts.extend(f"{v.vin}|{v.make}|{v.model}|{v.year}" for v in vehicles)
+    return hashlib.sha256("\n".join(str(p) for p in parts).encode('utf-8')).hexdigest()
+
+
+# Shipment and its vehicles come with the BOL: pdf/bol.html and the fingerprint read both, and of a
+# vehicle only the four columns the BOL table prints, so large shipments don't hydrate whole rows
+_BOL_PDF_LOADS = [
+    joinedload(BillOfLading.shipment).selectinload(Shipment.vehicles)
+    .load_only(Vehicle.vin, Vehicle.make, Vehicle.model, Vehicle.year),
+]
+
+
 @acct_bp.route('/bol/<int:bol_id>/export')
 @role_required('accountant', 'admin')
 def bol_export(bol_id: int):
-    bol = db.session.get(BillOfLading, bol_id)
+    bol = db.session.get(BillOfLading, bol_id, options=_BOL_PDF_LOADS)
     if not bol:
         abort(404)
-    vehicles = db.session.query(Vehicle).join(VehicleShipment, Vehicle.id == VehicleShipment.vehicle_id).\
-        filter(VehicleShipment.shipment_id == bol.shipment_id).all()
+    vehicles = bol.shipment.vehicles if bol.shipment else []
+    fingerprint = _bol_pdf_fingerprint(bol, vehicles)
+    # Reuse the stored PDF while its inputs are unchanged: no render, upload or DB write
+    if bol.pdf_path and bol.pdf_fingerprint == fingerprint:
+        return redirect(bol.pdf_path)
     path = render_bol_pdf(bol, vehicles)
     bol.pdf_path = path
+    bol.pdf_fingerprint = fingerprint
     db.session.commit()
     return redirect(path)
 
@@ -1201,28 +1641,25 @@ def bol_email(bol_id: int):
     recipient = (request.form.get('email') or '').strip()
     if not recipient:
         flash(_('Recipient email required'), 'danger'); return redirect(url_for('acct.bol_list'))
-    bol = db.session.get(BillOfLading, bol_id)
+    bol = db.session.get(BillOfLading, bol_id, options=_BOL_PDF_LOADS)
     if not bol:
         flash(_('BOL not found'), 'danger'); return redirect(url_for('acct.bol_list'))
-    vehicles = db.session.query(Vehicle).join(VehicleShipment, Vehicle.id == VehicleShipment.vehicle_id).\
-        filter(VehicleShipment.shipment_id == bol.shipment_id).all()
-    path = bol.pdf_path or render_bol_pdf(bol, vehicles)
-    if bol.pdf_path != path:
+    vehicles = bol.shipment.vehicles if bol.shipment else []
+    path, pdf_bytes = bol.pdf_path, None
+    fingerprint = _bol_pdf_fingerprint(bol, vehicles)
+    # a stored pdf is only attached while it still matches the BOL and its vehicles
+    if not path or bol.pdf_fingerprint != fingerprint:
+        # Freshly rendered: attach the bytes we already hold instead of downloading them back
+        path, pdf_bytes = render_bol_pdf_with_bytes(bol, vehicles)
         bol.pdf_path = path
+        bol.pdf_fingerprint = fingerprint
         try:
             db.session.commit()
         except Exception:
             db.session.rollback()
-    try:
-        msg = Message(subject=_('BOL %(n)s', n=bol.bol_number), recipients=[recipient])
-        msg.body = _('Please find attached Bill of Lading %(n)s.', n=bol.bol_number)
-        resp = requests.get(path, timeout=30)
-        resp.raise_for_status()
-        msg.attach(filename=f"{bol.bol_number}.pdf", content_type='application/pdf', data=resp.content)
-        mail.send(msg)
-        flash(_('Email sent'), 'success')
-    except Exception:
-        flash(_('Failed to send email'), 'danger')
+    msg = Message(subject=_('BOL %(n)s', n=bol.bol_number), recipients=[recipient])
+    msg.body = _('Please find attached Bill of Lading %(n)s.', n=bol.bol_number)
+    _flash_email_result(_send_pdf_email(msg, f"{bol.bol_number}.pdf", path, pdf_bytes, 'BillOfLading', bol.id))
     return redirect(url_for('acct.bol_list'))
 
 
@@ -1237,305 +1674,522 @@ def bol_upload(bol_id: int):
         flash(_('No file uploaded'), 'danger'); return redirect(url_for('acct.bol_list'))
     path = save_file_to_storage(f, folder="bols")
     bol.pdf_path = path
+    # a manual upload is not a rendering of the current data; the next export re-renders
+    bol.pdf_fingerprint = None
     db.session.commit()
     flash(_('BOL uploaded'), 'success')
     return redirect(url_for('acct.bol_list'))
 
 
-# Reports
-@acct_bp.route('/reports')
-@role_required('accountant', 'admin')
-def reports():
-    from io import BytesIO
+# Report data memo (opt-in via REPORT_CACHE_TTL): computed figures (never rendered HTML, which carries
+# user/flash state) are reused until the TTL passes or a write on this process bumps the epoch.
+_REPORT_CACHE: OrderedDict = OrderedDict()
+_REPORT_CACHE_MAX = 64
+_REPORT_CACHE_LOCK = threading.Lock()
+_report_epoch = 0
+
+
+def _bump_report_epoch(conn, cursor, statement, parameters, context, executemany):
+    global _report_epoch
+    if statement.lstrip()[:6].upper() in ('INSERT', 'UPDATE', 'DELETE'):
+        _report_epoch += 1
+
+
+@acct_bp.record_once
+def _watch_report_writes(state) -> None:
+    # Only this app's engine is watched, not every Engine in the process
+    with state.app.app_context():
+        event.listen(db.engine, 'after_cursor_execute', _bump_report_epoch)
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_report_epoch_on_commit(session):
+    # Bumping at execute time alone is not enough: a report computed between a write and its
+    # commit reads pre-commit data but would be stored under the post-write epoch. Bumping again
+    # once the commit lands files any such result under a stale epoch, so the next read drops it.
+    global _report_epoch
+    _report_epoch += 1
+
+
+def _cached_report(key: tuple, compute):
+    """Return compute() memoized under key (FIFO-capped, TTL from REPORT_CACHE_TTL)."""
+    ttl = current_app.config.get('REPORT_CACHE_TTL', 0)
+    if not ttl:
+        return compute()
+    now = time.monotonic()
+    with _REPORT_CACHE_LOCK:
+        hit = _REPORT_CACHE.get(key)
+        if hit and hit[0] > now and hit[1] == _report_epoch:
+            return hit[2]
+    epoch = _report_epoch
+    value = compute()
+    with _REPORT_CACHE_LOCK:
+        _REPORT_CACHE.pop(key, None)
+        _REPORT_CACHE[key] = (now + ttl, epoch, value)
+        while len(_REPORT_CACHE) > _REPORT_CACHE_MAX:
+            _REPORT_CACHE.popitem(last=False)
+    return value
+
+
+def _monthly_aggregates(now: datetime, live: bool = False) -> tuple[list[datetime], np.ndarray]:
+    """Month starts and the (12 x 7) _PL_BY_MONTH_STMT matrix for the 12 months ending in now's month.
+
+    Columns: revenue, paid CAR, freight USD, customs, vat, local transport, misc. The monthly P&L
+    and taxes views share one cached result (returned read-only because callers share it); live=True
+    always queries, bypassing the memo.
+    """
+    def compute():
+        month_starts = last_month_starts(now)
+        sums = sums_by_month(_PL_BY_MONTH_STMT, month_starts)
+        sums.flags.writeable = False
+        return month_starts, sums
+    if live:
+        return compute()
+    return _cached_report(('monthly_sums', now.strftime('%Y-%m')), compute)
+
+
+def _monthly_pl_series(now: datetime) -> tuple[list, list, list]:
+    """Labels, revenue and expenses for the 12-month P&L ending in now's month."""
+    usd_to_omr = _config_usd_to_omr()
+    # Every source table grouped by month in a single round trip
+    month_starts, sums = _monthly_aggregates(now)
+    labels = [dt.strftime('%b %Y') for dt in month_starts]
+    # IFRS: revenue from GL R* excluding client funds
+    revenue = sums[:, 0].tolist()
+    # Expenses: car purchase totals + freight converted to OMR + operational costs, as one
+    # matrix-vector product instead of a temporary array per term
+    expense_weights = np.array([0.0, 1.0, usd_to_omr, 1.0, 1.0, 1.0, 1.0])
+    expenses = (sums @ expense_weights).tolist()
+    return labels, revenue, expenses
+
+
+def _taxes_series(now: datetime) -> tuple[list, list, list]:
+    """Labels, customs and VAT for the 12 months ending in now's month."""
+    month_starts, sums = _monthly_aggregates(now)
+    labels = [dt.strftime('%b %Y') for dt in month_starts]
+    return labels, sums[:, 3].tolist(), sums[:, 4].tolist()
+
+
+def _cash_flow_series(now: datetime) -> tuple[list, list]:
+    """Labels and net bank (A100*) movement for the 12 months ending in now's month."""
+    month_starts = last_month_starts(now)
+    net_m = sums_by_month(_BANK_NET_BY_MONTH_STMT, month_starts)
+    labels = [dt.strftime('%b %Y') for dt in month_starts]
+    return labels, net_m[:, 0].tolist()
+
+
+def _balance_sheet_totals() -> tuple[float, float, float]:
+    """Assets, total liabilities and client deposits (L200*) from the GL."""
+    # One pass over journal lines with conditional sums instead of one scan per figure
+    net = JournalLine.debit - JournalLine.credit
+    is_asset = db.and_(Account.code_class == 'A', JournalEntry.is_client_fund.is_(False))
+    assets, liabilities, deposits = (
+        db.session.query(
+            # Assets exclude client-fund entries
+            db.func.coalesce(db.func.sum(db.case((is_asset, net), else_=0)), 0),
+            # Total liabilities including client funds
+            db.func.coalesce(db.func.sum(db.case((Account.code_class == 'L', net), else_=0)), 0),
+            # Client deposits account (L200*) balance from all entries
+            db.func.coalesce(db.func.sum(db.case((Account.root_code == 'L200', net), else_=0)), 0),
+        )
+        .join(Account, JournalLine.account_id == Account.id)
+        .join(JournalEntry, JournalLine.entry_id == JournalEntry.id)
+        .filter(db.or_(is_asset, Account.code_class == 'L'))
+        .one()
+    )
+    # Ensure consistent float arithmetic to avoid float-Decimal TypeError
+    return float(assets), -float(liabilities), -float(deposits)
+
+
+def _trial_balance_rows() -> list[tuple]:
+    """(code, name, debit, credit, net) per account from the GL; net comes back computed by the DB."""
+    return [tuple(row) for row in _trial_balance_query()]
+
+
+def _trial_balance_query():
+    # Amounts come back as floats from the DB (reporting only; storage stays NUMERIC)
+    dr = db.func.coalesce(db.func.sum(JournalLine.debit), 0)
+    cr = db.func.coalesce(db.func.sum(JournalLine.credit), 0)
+    return (
+        db.session.query(Account.code, Account.name, db.cast(dr, db.Float), db.cast(cr, db.Float), db.cast(dr - cr, db.Float))
+        .join(JournalLine, JournalLine.account_id == Account.id)
+        .group_by(Account.code, Account.name)
+        .order_by(Account.code.asc())
+    )
+
+
+def _draw_pdf_rows(c, y: float, top: float, rows, columns: tuple, line_height: float, header: tuple = ()) -> float:
+    """Write rows of preformatted strings downwards from y and return the next free y.
+
+    columns gives (x, right_aligned) per cell. Each page's rows go into one text object with the
+    font set once, instead of a drawString/drawRightString (and font switch) per cell. header holds
+    (x, label) pairs drawn in bold at the top of every page.
+    """
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    def start_page(y):
+        if header:
+            c.setFont('Helvetica-Bold', 11)
+            for x, label in header:
+                c.drawString(x, y, label)
+            y -= 14
+        text = c.beginText()
+        text.setFont('Helvetica', 10)
+        return text, y
+
+    text, y = start_page(y)
+    for row in rows:
+        if y < 40:
+            c.drawText(text); c.showPage()
+            text, y = start_page(top)
+        for (x, right), cell in zip(columns, row):
+            text.setTextOrigin(x - stringWidth(cell, 'Helvetica', 10) if right else x, y)
+            text.textOut(cell)
+        y -= line_height
+    c.drawText(text)
+    return y
+
+
+def _draw_monthly_pl_pdf(out, title: str, header: tuple, rows: list) -> None:
+    """Draw the monthly P&L table into out; needs no request or app context."""
     from reportlab.lib.pagesizes import A4
     from reportlab.pdfgen import canvas
-    from openpyxl import Workbook
-    report_type = request.args.get('type', 'monthly')
-    export = request.args.get('export')
-
-    now = datetime.utcnow()
-    if report_type == 'monthly':
-        labels, revenue, expenses = [], [], []
-        dt = datetime(now.year, now.month, 1)
-        usd_to_omr = float(current_app.config.get('OMR_EXCHANGE_RATE', 0.385))
-        for month_index in range(12):
-            start = dt
-            end = datetime(dt.year + 1, 1, 1) if dt.month == 12 else datetime(dt.year, dt.month + 1, 1)
-            labels.append(dt.strftime('%b %Y'))
-            # IFRS: revenue from GL R* excluding client funds
-            rev = (
-                db.session.query(db.func.coalesce(db.func.sum(JournalLine.credit - JournalLine.debit), 0))
-                .join(Account, JournalLine.account_id == Account.id)
-                .join(JournalEntry, JournalLine.entry_id == JournalEntry.id)
-                .filter(
-                    JournalEntry.entry_date >= start,
-                    JournalEntry.entry_date < end,
-                    Account.code.like('R%'),
-                    JournalEntry.is_client_fund.is_(False),
-                )
-                .scalar()
-                or 0
-            )
-            # Expenses: combine operational costs + car purchase totals in period
-            car_cost = db.session.query(db.func.coalesce(db.func.sum(Invoice.total_omr), 0)).\
-                filter(Invoice.created_at >= start, Invoice.created_at < end, Invoice.status == 'Paid', Invoice.invoice_type == 'CAR').scalar() or 0
-            freight = db.session.query(db.func.coalesce(db.func.sum(Shipment.cost_freight_usd), 0)).filter(Shipment.created_at >= start, Shipment.created_at < end).scalar() or 0
-            customs = db.session.query(db.func.coalesce(db.func.sum(InternationalCost.customs_omr), 0)).filter(InternationalCost.created_at >= start, InternationalCost.created_at < end).scalar() or 0
-            vat = db.session.query(db.func.coalesce(db.func.sum(InternationalCost.vat_omr), 0)).filter(InternationalCost.created_at >= start, InternationalCost.created_at < end).scalar() or 0
-            local_t = db.session.query(db.func.coalesce(db.func.sum(InternationalCost.local_transport_omr), 0)).filter(InternationalCost.created_at >= start, InternationalCost.created_at < end).scalar() or 0
-            misc = db.session.query(db.func.coalesce(db.func.sum(InternationalCost.misc_omr), 0)).filter(InternationalCost.created_at >= start, InternationalCost.created_at < end).scalar() or 0
-            exp = float(freight) * usd_to_omr + float(customs or 0) + float(vat or 0) + float(local_t or 0) + float(misc or 0) + float(car_cost or 0)
-            revenue.append(float(rev)); expenses.append(float(exp))
-            if dt.month == 1: dt = datetime(dt.year - 1, 12, 1)
-            else: dt = datetime(dt.year, dt.month - 1, 1)
-        labels, revenue, expenses = list(reversed(labels)), list(reversed(revenue)), list(reversed(expenses))
+    c = canvas.Canvas(out, pagesize=A4)
+    width, height = A4; y = height - 40
+    c.setFont('Helvetica-Bold', 16); c.drawString(40, y, title)
+    cells = [(m, f"{r:,.3f}", f"{e:,.3f}", f"{p:,.3f}") for m, r, e, p in rows]
+    _draw_pdf_rows(c, y - 25, height - 40, cells, ((40, False), (300, True), (420, True), (540, True)), 12,
+                   header=tuple(zip((40, 200, 320, 440), header)))
+    c.showPage(); c.save()
 
-        if export == 'pdf':
-            buf = BytesIO(); c = canvas.Canvas(buf, pagesize=A4)
-            width, height = A4; y = height - 40
-            c.setFont('Helvetica-Bold', 16); c.drawString(40, y, _('Monthly Profit & Loss'))
-            y -= 25; c.setFont('Helvetica-Bold', 11);
-            c.drawString(40, y, _('Month')); c.drawString(200, y, _('Revenue')); c.drawString(320, y, _('Expenses')); c.drawString(440, y, _('Profit'))
-            y -= 14; c.setFont('Helvetica', 10)
-            for m, r, e in zip(labels, revenue, expenses):
-                if y < 40:
-                    c.showPage(); y = height - 40; c.setFont('Helvetica-Bold', 11)
-                    c.drawString(40, y, _('Month')); c.drawString(200, y, _('Revenue')); c.drawString(320, y, _('Expenses')); c.drawString(440, y, _('Profit'))
-                    y -= 14; c.setFont('Helvetica', 10)
-                c.drawString(40, y, m); c.drawRightString(300, y, f"{r:,.3f}"); c.drawRightString(420, y, f"{e:,.3f}"); c.drawRightString(540, y, f"{(r-e):,.3f}"); y -= 12
-            c.showPage(); c.save(); buf.seek(0)
-            return send_file(buf, mimetype='application/pdf', as_attachment=True, download_name='monthly_pl.pdf')
-        
-        
-    if report_type == 'monthly' and export == 'xlsx':
-        wb = Workbook(); ws = wb.active; ws.title = 'Monthly P&L'; ws.append([_('Month'),_('Revenue'),_('Expenses'),_('Profit')])
-        for m, r, e in zip(labels, revenue, expenses): ws.append([m, r, e, r-e])
-        buf = BytesIO(); wb.save(buf); buf.seek(0)
-        return send_file(buf, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', as_attachment=True, download_name='monthly_pl.xlsx')
 
-    if report_type == 'by_client':
-        # Aggregate invoices by client
-        # Sum GL revenue by customer (R* accounts) excluding client funds
-        rows = (
-            db.session.query(Customer.company_name, db.func.coalesce(db.func.sum(JournalLine.credit - JournalLine.debit), 0))
-            .join(JournalEntry, JournalEntry.customer_id == Customer.id, isouter=True)
-            .join(JournalLine, JournalLine.entry_id == JournalEntry.id, isouter=True)
-            .join(Account, JournalLine.account_id == Account.id, isouter=True)
-            .filter(Account.code.like('R%'), JournalEntry.is_client_fund.is_(False))
-            .group_by(Customer.company_name)
-            .order_by(Customer.company_name.asc())
-            .all()
-        )
-        data = [(name or '-', float(total or 0)) for name, total in rows]
-        headers = [_('Client'), _('Total (OMR)')]
-        if export == 'xlsx':
-            wb = Workbook(); ws = wb.active; ws.title = 'Invoices by Client'; ws.append([_('Client'), _('Total (OMR)')])
-            for n, t in data: ws.append([n, t])
-            buf = BytesIO(); wb.save(buf); buf.seek(0)
-            return send_file(buf, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', as_attachment=True, download_name='invoices_by_client.xlsx')
-        if export == 'pdf':
-            buf = BytesIO(); c = canvas.Canvas(buf, pagesize=A4)
-            width, height = A4; y = height - 40
-            c.setFont('Helvetica-Bold', 16); c.drawString(40, y, _('Invoices by Client')); y -= 20; c.setFont('Helvetica', 10)
-            for n, t in data:
-                if y < 40: c.showPage(); y = height - 40; c.setFont('Helvetica', 10)
-                c.drawString(40, y, n); c.drawRightString(550, y, f"{t:,.3f}"); y -= 14
-            c.showPage(); c.save(); buf.seek(0)
-            return send_file(buf, mimetype='application/pdf', as_attachment=True, download_name='invoices_by_client.pdf')
-        return render_template('accounting/reports.html', report_type='by_client', table=data, headers=headers)
-
-    if report_type == 'taxes':
-        # Monthly customs and VAT
-        labels, customs_m, vat_m = [], [], []
-        dt = datetime(now.year, now.month, 1)
-        for month_index in range(12):
-            start = dt
-            end = datetime(dt.year + 1, 1, 1) if dt.month == 12 else datetime(dt.year, dt.month + 1, 1)
-            labels.append(dt.strftime('%b %Y'))
-            customs = db.session.query(db.func.coalesce(db.func.sum(InternationalCost.customs_omr), 0)).\
-                filter(InternationalCost.created_at >= start, InternationalCost.created_at < end).scalar() or 0
-            vat = db.session.query(db.func.coalesce(db.func.sum(InternationalCost.vat_omr), 0)).\
-                filter(InternationalCost.created_at >= start, InternationalCost.created_at < end).scalar() or 0
-            customs_m.append(float(customs)); vat_m.append(float(vat))
-            if dt.month == 1: dt = datetime(dt.year - 1, 12, 1)
-            else: dt = datetime(dt.year, dt.month - 1, 1)
-        labels, customs_m, vat_m = list(reversed(labels)), list(reversed(customs_m)), list(reversed(vat_m))
-        if export == 'xlsx':
-            wb = Workbook(); ws = wb.active; ws.title = 'Taxes'; ws.append([_('Month'), _('Customs (OMR)'), _('VAT (OMR)')])
-            for m, cst, vt in zip(labels, customs_m, vat_m): ws.append([m, cst, vt])
-            buf = BytesIO(); wb.save(buf); buf.seek(0)
-            return send_file(buf, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', as_attachment=True, download_name='taxes.xlsx')
-        if export == 'pdf':
-            buf = BytesIO(); c = canvas.Canvas(buf, pagesize=A4)
-            width, height = A4; y = height - 40
-            c.setFont('Helvetica-Bold', 16); c.drawString(40, y, _('Customs & VAT by Month')); y -= 20; c.setFont('Helvetica', 10)
-            for m, cst, vt in zip(labels, customs_m, vat_m):
-                if y < 40: c.showPage(); y = height - 40; c.setFont('Helvetica', 10)
-                c.drawString(40, y, m); c.drawRightString(320, y, f"{cst:,.3f}"); c.drawRightString(560, y, f"{vt:,.3f}"); y -= 14
-            c.showPage(); c.save(); buf.seek(0)
-            return send_file(buf, mimetype='application/pdf', as_attachment=True, download_name='taxes.pdf')
-        return render_template('accounting/reports.html', report_type='taxes', chart={"months": labels, "customs": customs_m, "vat": vat_m})
-
-    if report_type == 'balance_sheet':
-        # Balance Sheet with Client Deposits under Current Liabilities
-        def sum_acct(prefix: str, exclude_client_fund: bool | None = None):
-            from ...models import Account, JournalLine, JournalEntry
-            q = db.session.query(db.func.coalesce(db.func.sum(JournalLine.debit - JournalLine.credit), 0)).\
-                join(Account, JournalLine.account_id == Account.id).\
-                join(JournalEntry, JournalLine.entry_id == JournalEntry.id).\
-                filter(Account.code.like(f"{prefix}%"))
-            if exclude_client_fund is True:
-                q = q.filter(JournalEntry.is_client_fund.is_(False))
-            elif exclude_client_fund is False:
-                q = q.filter(JournalEntry.is_client_fund.is_(True))
-            return float(q.scalar() or 0)
-        assets = sum_acct('A', exclude_client_fund=True)
-        # Total liabilities including client funds
-        liabilities_total = -sum_acct('L', exclude_client_fund=None)
-        # Client deposits account (L200*) balance from all entries (client funds scope only preferred)
-        # Ensure consistent float arithmetic to avoid float-Decimal TypeError
-        client_deposits_raw = (
-            db.session.query(db.func.coalesce(db.func.sum(JournalLine.debit - JournalLine.credit), 0))
-            .join(Account, JournalLine.account_id == Account.id)
-            .join(JournalEntry, JournalLine.entry_id == JournalEntry.id)
-            .filter(Account.code.like('L200%'))
-            .scalar()
-            or 0
-        )
-        client_deposits = -float(client_deposits_raw)
-        other_liabilities = max(0.0, liabilities_total - client_deposits)
-        equity = assets - (client_deposits + other_liabilities)
-        data = [
-            (_('Assets'), assets),
-            (_('Client Deposits (Current Liabilities)'), client_deposits),
-            (_('Other Liabilities'), other_liabilities),
-            (_('Equity'), equity),
-        ]
-        headers = [_('Category'), _('Amount (OMR)')]
-        return render_template('accounting/reports.html', report_type='balance_sheet', table=data, headers=headers)
+# Background PDF exports: rendering runs on a small pool so the request worker returns at once.
+# Job state lives on disk ({job}.part while rendering, {job}.pdf when done) so any worker on the
+# host can answer the poll; finished files are kept for an hour so the download can be retried.
+_PDF_EXPORT_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix='acct-pdf')
+
+
+_PDF_EXPORT_MAX_AGE = 3600
+
+
+def _pdf_export_dir() -> str:
+    folder = os.path.join(tempfile.gettempdir(), 'acct-exports')
+    os.makedirs(folder, exist_ok=True)
+    return folder
 
-    if report_type == 'trial_balance':
-        # Trial balance from GL (all entries)
-        rows = (
-            db.session.query(
-                Account.code,
-                Account.name,
-                db.func.coalesce(db.func.sum(JournalLine.debit), 0),
-                db.func.coalesce(db.func.sum(JournalLine.credit), 0),
-            )
-            .join(JournalLine, JournalLine.account_id == Account.id)
-            .group_by(Account.code, Account.name)
-            .order_by(Account.code.asc())
-            .all()
-        )
-        data = [(code, name, float(dr or 0), float(cr or 0), float((dr or 0) - (cr or 0))) for code, name, dr, cr in rows]
-        headers = [_('Account Code'), _('Account Name'), _('Debit'), _('Credit'), _('Net (Dr-Cr)')]
-        return render_template('accounting/reports.html', report_type='trial_balance', table=data, headers=headers)
-
-    if report_type == 'general_ledger':
-        # General ledger for a specific account
-        acct_code = (request.args.get('code') or 'A100').strip()
-        acct = db.session.query(Account).filter(Account.code == acct_code).first()
-        if not acct:
-            return render_template('accounting/reports.html', report_type='general_ledger', table=[], headers=[_('Date'), _('Description'), _('Debit'), _('Credit')])
-        rows = (
-            db.session.query(JournalEntry.entry_date, JournalEntry.description, JournalLine.debit, JournalLine.credit)
-            .join(JournalLine, JournalLine.entry_id == JournalEntry.id)
-            .filter(JournalLine.account_id == acct.id)
-            .order_by(JournalEntry.entry_date.asc(), JournalEntry.id.asc())
-            .limit(1000)
-            .all()
-        )
-        data = [(
-            (dt.strftime('%Y-%m-%d') if dt else ''), desc or '-', float(dr or 0), float(cr or 0)
-        ) for dt, desc, dr, cr in rows]
-        headers = [_('Date'), _('Description'), _('Debit'), _('Credit')]
-        return render_template('accounting/reports.html', report_type='general_ledger', table=data, headers=headers)
-
-    if report_type == 'cash_flow':
-        # Simple cash flow (Direct): monthly net cash movement on Bank accounts (A100*)
-        method = (request.args.get('method') or 'direct').strip().lower()
-        now = datetime.utcnow()
-        dt = datetime(now.year, now.month, 1)
-        labels = []
-        net = []
-        for month_index in range(12):
-            start = dt
-            end = datetime(dt.year + 1, 1, 1) if dt.month == 12 else datetime(dt.year, dt.month + 1, 1)
-            labels.append(dt.strftime('%b %Y'))
-            q = (
-                db.session.query(db.func.coalesce(db.func.sum(JournalLine.debit - JournalLine.credit), 0))
-                .join(Account, JournalLine.account_id == Account.id)
-                .join(JournalEntry, JournalLine.entry_id == JournalEntry.id)
-                .filter(
-                    JournalEntry.entry_date >= start,
-                    JournalEntry.entry_date < end,
-                    Account.code.like('A100%'),
-                    JournalEntry.is_client_fund.is_(False),
-                )
-            )
-            val = float(q.scalar() or 0)
-            net.append(val)
-            if dt.month == 1: dt = datetime(dt.year - 1, 12, 1)
-            else: dt = datetime(dt.year, dt.month - 1, 1)
-        labels, net = list(reversed(labels)), list(reversed(net))
-        headers = [_('Month'), _('Net Cash Movement (OMR)')]
-        table = list(zip(labels, net))
-        return render_template('accounting/reports.html', report_type='cash_flow', table=table, headers=headers)
-
-    if report_type == 'ar_aging':
-        # Accounts receivable by customer from invoices minus payments
-        rows = db.session.query(Customer.company_name, db.func.coalesce(db.func.sum(Invoice.total_omr), 0) - db.func.coalesce(db.func.sum(Payment.amount_omr), 0)).\
-            join(Invoice, Invoice.customer_id == Customer.id, isouter=True).\
-            join(Payment, Payment.invoice_id == Invoice.id, isouter=True).\
-            group_by(Customer.company_name).all()
-        data = [(n or '-', float(bal or 0)) for n, bal in rows]
-        headers = [_('Client'), _('Balance (OMR)')]
-        return render_template('accounting/reports.html', report_type='ar_aging', table=data, headers=headers)
-
-    if report_type == 'inventory_by_vehicle':
-        # Inventory value per vehicle (capitalized purchase OMR)
-        from ...models import Vehicle
-        rate = Decimal(str(current_app.config.get('OMR_EXCHANGE_RATE', 0.385)))
-        rows = db.session.query(Vehicle.vin, Vehicle.make, Vehicle.model, Vehicle.year, Vehicle.purchase_price_usd).all()
-        data = [(vin, make, model, year, float((Decimal(str(pp or 0)) * rate))) for vin, make, model, year, pp in rows]
-        headers = ['VIN', _('Make'), _('Model'), _('Year'), _('Value (OMR)')]
-        return render_template('accounting/reports.html', report_type='inventory_by_vehicle', table=data, headers=headers)
-
-    if report_type == 'fines_revenue':
-        # Sum fines revenue (R300), excluding client fund flagged entries
-        total = db.session.query(db.func.coalesce(db.func.sum(JournalLine.credit - JournalLine.debit), 0)).\
-            join(Account, JournalLine.account_id == Account.id).\
-            join(JournalEntry, JournalLine.entry_id == JournalEntry.id).\
-            filter(Account.code == 'R300', JournalEntry.is_client_fund.is_(False)).scalar() or 0
-        headers = [_('Metric'), _('Amount (OMR)')]
-        return render_template('accounting/reports.html', report_type='fines_revenue', table=[[str(_('Fines Revenue')), float(total)]], headers=headers)
 
-    if report_type == 'customer_statement':
-        # Detailed statement for a single customer
+def _pdf_export_path(job_id: str, suffix: str = '.pdf') -> str:
+    return os.path.join(_pdf_export_dir(), job_id + suffix)
+
+
+def _sweep_pdf_exports() -> None:
+    """Delete exports (and renders abandoned mid-way) older than _PDF_EXPORT_MAX_AGE seconds."""
+    cutoff = time.time() - _PDF_EXPORT_MAX_AGE
+    for entry in os.scandir(_pdf_export_dir()):
         try:
-            customer_id = int(request.args.get('customer_id'))
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def _submit_pdf_export(draw, *args) -> str:
+    """Queue draw(file, *args) on the export pool and return the job id to poll."""
+    _sweep_pdf_exports()
+    job_id = uuid.uuid4().hex
+    part, final = _pdf_export_path(job_id, '.part'), _pdf_export_path(job_id)
+    open(part, 'wb').close()
+    logger = current_app.logger
+
+    def run():
+        try:
+            with open(part, 'wb') as fh:
+                draw(fh, *args)
+            os.replace(part, final)
         except Exception:
-            customer_id = None
-        if not customer_id:
-            return render_template('accounting/reports.html', report_type='customer_statement', table=[], headers=[_('Date'), _('Description'), _('Debit'), _('Credit'), _('Balance')])
-        rows = []
-        balance = Decimal('0')
-        invs = db.session.query(Invoice).filter(Invoice.customer_id == customer_id).order_by(Invoice.created_at.asc()).all()
-        for inv in invs:
-            amt = Decimal(str(inv.total_omr or 0))
+            logger.exception('Failed to render PDF export %s', job_id)
+            # Leave a marker first so a poll never finds neither file, then drop the partial render
+            # (already gone if the sweep got to it)
+            with contextlib.suppress(OSError):
+                open(_pdf_export_path(job_id, '.err'), 'wb').close()
+            with contextlib.suppress(OSError):
+                os.remove(part)
+
+    _PDF_EXPORT_POOL.submit(run)
+    return job_id
+
+
+@acct_bp.route('/reports/download/<job_id>')
+@role_required('accountant', 'admin')
+def reports_download(job_id: str):
+    try:
+        job_id = uuid.UUID(hex=job_id).hex
+    except ValueError:
+        abort(404)
+    final = _pdf_export_path(job_id)
+    if not os.path.exists(final):
+        if os.path.exists(_pdf_export_path(job_id, '.part')):
+            return jsonify({'status': 'pending'}), 202
+        if os.path.exists(_pdf_export_path(job_id, '.err')):
+            return jsonify({'status': 'failed'}), 500
+        abort(404)
+    # Sent by path so the server can hand the file to sendfile(2) (or Apache/lighttpd via USE_X_SENDFILE)
+    return send_file(final, mimetype='application/pdf', as_attachment=True, download_name='monthly_pl.pdf')
+
+
+# Reports
+def _report_monthly(export: str | None):
+    now = _now()
+    labels, revenue, expenses = _monthly_pl_series(now)
+    profit = (np.array(revenue) - np.array(expenses)).tolist()
+    if export == 'pdf':
+        # Translations need the request, so resolve every string before the drawing may leave it
+        pdf_args = (_('Monthly Profit & Loss'), (_('Month'), _('Revenue'), _('Expenses'), _('Profit')),
+                    list(zip(labels, revenue, expenses, profit)))
+        if request.args.get('async') == '1':
+            job_id = _submit_pdf_export(_draw_monthly_pl_pdf, *pdf_args)
+            return jsonify({'job_id': job_id, 'download_url': url_for('acct.reports_download', job_id=job_id)}), 202
+        buf = _export_buffer(); _draw_monthly_pl_pdf(buf, *pdf_args); buf.seek(0)
+        return send_file(buf, mimetype='application/pdf', as_attachment=True, download_name='monthly_pl.pdf')
+    if export == 'xlsx':
+        wb, ws = _write_only_workbook('Monthly P&L'); ws.append([_('Month'),_('Revenue'),_('Expenses'),_('Profit')])
+        for row in zip(labels, revenue, expenses, profit): ws.append(list(row))
+        buf = _export_buffer(); wb.save(buf); buf.seek(0)
+        return send_file(buf, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', as_attachment=True, download_name='monthly_pl.xlsx')
+    return render_template('accounting/reports.html', report_type='monthly', chart={"months": labels, "revenue": revenue, "expenses": expenses})
+
+
+def _report_by_client(export: str | None):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    # Aggregate invoices by client
+    # Sum GL revenue by customer (R* accounts) excluding client funds
+    q = (
+        db.session.query(Customer.company_name, db.cast(db.func.coalesce(db.func.sum(JournalLine.credit - JournalLine.debit), 0), db.Float))
+        .join(JournalEntry, JournalEntry.customer_id == Customer.id, isouter=True)
+        .join(JournalLine, JournalLine.entry_id == JournalEntry.id, isouter=True)
+        .join(Account, JournalLine.account_id == Account.id, isouter=True)
+        .filter(Account.code_class == 'R', JournalEntry.is_client_fund.is_(False))
+        .group_by(Customer.company_name)
+        .order_by(Customer.company_name.asc())
+    )
+    if export == 'xlsx':
+        # Rows go from the cursor straight into the streaming sheet, never held as a list
+        wb, ws = _write_only_workbook('Invoices by Client'); ws.append([_('Client'), _('Total (OMR)')])
+        for name, total in q.yield_per(1000): ws.append([name or '-', total])
+        buf = _export_buffer(); wb.save(buf); buf.seek(0)
+        return send_file(buf, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', as_attachment=True, download_name='invoices_by_client.xlsx')
+    if export == 'pdf':
+        buf = _export_buffer(); c = canvas.Canvas(buf, pagesize=A4)
+        width, height = A4; y = height - 40
+        c.setFont('Helvetica-Bold', 16); c.drawString(40, y, _('Invoices by Client'))
+        # Like the XLSX branch, format rows as they come off the cursor instead of listing them first
+        cells = ((name or '-', f"{total:,.3f}") for name, total in q.yield_per(1000))
+        _draw_pdf_rows(c, y - 20, height - 40, cells, ((40, False), (550, True)), 14)
+        c.showPage(); c.save(); buf.seek(0)
+        return send_file(buf, mimetype='application/pdf', as_attachment=True, download_name='invoices_by_client.pdf')
+    data = [(name or '-', total) for name, total in q.all()]
+    headers = [_('Client'), _('Total (OMR)')]
+    return render_template('accounting/reports.html', report_type='by_client', table=data, headers=headers)
+
+
+def _report_taxes(export: str | None):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    # Monthly customs and VAT
+    now = _now()
+    labels, customs_m, vat_m = _taxes_series(now)
+    if export == 'xlsx':
+        wb, ws = _write_only_workbook('Taxes'); ws.append([_('Month'), _('Customs (OMR)'), _('VAT (OMR)')])
+        for m, cst, vt in zip(labels, customs_m, vat_m): ws.append([m, cst, vt])
+        buf = _export_buffer(); wb.save(buf); buf.seek(0)
+        return send_file(buf, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', as_attachment=True, download_name='taxes.xlsx')
+    if export == 'pdf':
+        buf = _export_buffer(); c = canvas.Canvas(buf, pagesize=A4)
+        width, height = A4; y = height - 40
+        c.setFont('Helvetica-Bold', 16); c.drawString(40, y, _('Customs & VAT by Month'))
+        cells = [(m, f"{cst:,.3f}", f"{vt:,.3f}") for m, cst, vt in zip(labels, customs_m, vat_m)]
+        _draw_pdf_rows(c, y - 20, height - 40, cells, ((40, False), (320, True), (560, True)), 14)
+        c.showPage(); c.save(); buf.seek(0)
+        return send_file(buf, mimetype='application/pdf', as_attachment=True, download_name='taxes.pdf')
+    return render_template('accounting/reports.html', report_type='taxes', chart={"months": labels, "customs": customs_m, "vat": vat_m})
+
+
+def _report_balance_sheet(export: str | None):
+    # Balance Sheet with Client Deposits under Current Liabilities
+    assets, liabilities_total, client_deposits = _cached_report(('balance_sheet',), _balance_sheet_totals)
+    other_liabilities = max(0.0, liabilities_total - client_deposits)
+    equity = assets - (client_deposits + other_liabilities)
+    data = [
+        (_('Assets'), assets),
+        (_('Client Deposits (Current Liabilities)'), client_deposits),
+        (_('Other Liabilities'), other_liabilities),
+        (_('Equity'), equity),
+    ]
+    headers = [_('Category'), _('Amount (OMR)')]
+    return render_template('accounting/reports.html', report_type='balance_sheet', table=data, headers=headers)
+
+
+def _report_trial_balance(export: str | None):
+    # Trial balance from GL (all entries)
+    headers = [_('Account Code'), _('Account Name'), _('Debit'), _('Credit'), _('Net (Dr-Cr)')]
+    if export == 'xlsx':
+        wb, ws = _write_only_workbook('Trial Balance'); ws.append(headers)
+        for row in _trial_balance_query().yield_per(1000):
+            ws.append(list(row))
+        buf = _export_buffer(); wb.save(buf); buf.seek(0)
+        return send_file(buf, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', as_attachment=True, download_name='trial_balance.xlsx')
+    data = _cached_report(('trial_balance',), _trial_balance_rows)
+    return render_template('accounting/reports.html', report_type='trial_balance', table=data, headers=headers)
+
+
+# Journal lines per general ledger page
+_GENERAL_LEDGER_PAGE_SIZE = 1000
+
+
+def _report_general_ledger(export: str | None):
+    # General ledger for a specific account
+    acct_code = (request.args.get('code') or 'A100').strip()
+    acct = db.session.query(Account).filter(Account.code == acct_code).first()
+    if not acct:
+        return render_template('accounting/reports.html', report_type='general_ledger', table=[], headers=[_('Date'), _('Description'), _('Debit'), _('Credit')])
+    # Keyset pagination on (entry_date, entry id, line id): each page seeks past the previous page's last row
+    page_size = _GENERAL_LEDGER_PAGE_SIZE
+    q = (
+        db.session.query(JournalEntry.entry_date, JournalEntry.description, JournalLine.debit, JournalLine.credit, JournalEntry.id, JournalLine.id)
+        .join(JournalLine, JournalLine.entry_id == JournalEntry.id)
+        .filter(JournalLine.account_id == acct.id)
+    )
+    try:
+        after_date = datetime.fromisoformat(request.args['after_date'])
+        after_entry = int(request.args['after_entry'])
+        after_line = int(request.args['after_line'])
+    except (KeyError, ValueError):
+        after_date = None
+    if after_date is not None:
+        q = q.filter(db.or_(
+            JournalEntry.entry_date > after_date,
+            db.and_(JournalEntry.entry_date == after_date, JournalEntry.id > after_entry),
+            db.and_(JournalEntry.entry_date == after_date, JournalEntry.id == after_entry, JournalLine.id > after_line),
+        ))
+    rows = q.order_by(JournalEntry.entry_date.asc(), JournalEntry.id.asc(), JournalLine.id.asc()).limit(page_size + 1).all()
+    next_url = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last_date, last_entry, last_line = rows[-1][0], rows[-1][4], rows[-1][5]
+        if last_date is not None:
+            next_url = url_for('acct.reports', type='general_ledger', code=acct_code, after_date=last_date.isoformat(),
+                               after_entry=last_entry, after_line=last_line)
+    data = [(
+        (dt.strftime('%Y-%m-%d') if dt else ''), desc or '-', float(dr or 0), float(cr or 0)
+    ) for dt, desc, dr, cr, _entry_id, _line_id in rows]
+    headers = [_('Date'), _('Description'), _('Debit'), _('Credit')]
+    return render_template('accounting/reports.html', report_type='general_ledger', table=data, headers=headers, next_url=next_url)
+
+
+def _report_cash_flow(export: str | None):
+    # Simple cash flow (Direct): monthly net cash movement on Bank accounts (A100*)
+    now = _now()
+    method = (request.args.get('method') or 'direct').strip().lower()
+    labels, net = _cached_report(('cash_flow', now.strftime('%Y-%m')), lambda: _cash_flow_series(now))
+    headers = [_('Month'), _('Net Cash Movement (OMR)')]
+    table = list(zip(labels, net))
+    return render_template('accounting/reports.html', report_type='cash_flow', table=table, headers=headers)
+
+
+def _report_ar_aging(export: str | None):
+    # Accounts receivable by customer from invoices minus payments.
+    # Billed and paid are aggregated per customer separately: summing across an
+    # Invoice x Payment join repeats each invoice total once per payment.
+    billed_sub = db.session.query(Invoice.customer_id, db.func.sum(Invoice.total_omr).label('billed')).\
+        group_by(Invoice.customer_id).subquery()
+    paid_sub = db.session.query(Invoice.customer_id, db.func.sum(Payment.amount_omr).label('paid')).\
+        join(Payment, Payment.invoice_id == Invoice.id).\
+        group_by(Invoice.customer_id).subquery()
+    balance = db.func.coalesce(db.func.sum(billed_sub.c.billed), 0) - db.func.coalesce(db.func.sum(paid_sub.c.paid), 0)
+    rows = db.session.query(Customer.company_name, db.cast(balance, db.Float)).\
+        outerjoin(billed_sub, billed_sub.c.customer_id == Customer.id).\
+        outerjoin(paid_sub, paid_sub.c.customer_id == Customer.id).\
+        group_by(Customer.company_name).all()
+    data = [(n or '-', bal) for n, bal in rows]
+    headers = [_('Client'), _('Balance (OMR)')]
+    return render_template('accounting/reports.html', report_type='ar_aging', table=data, headers=headers)
+
+
+def _report_inventory_by_vehicle(export: str | None):
+    # Inventory value per vehicle (capitalized purchase OMR)
+    # USD -> OMR conversion done by the database (NUMERIC math) rather than per-row Decimals
+    value_omr = db.func.coalesce(Vehicle.purchase_price_usd, 0) * db.bindparam('omr_rate', _config_omr_rate(), type_=db.Numeric(12, 6))
+    # ...and returned as a float, so the rows go to the template as fetched
+    data = [tuple(row) for row in db.session.query(Vehicle.vin, Vehicle.make, Vehicle.model, Vehicle.year, db.cast(value_omr, db.Float))]
+    headers = ['VIN', _('Make'), _('Model'), _('Year'), _('Value (OMR)')]
+    return render_template('accounting/reports.html', report_type='inventory_by_vehicle', table=data, headers=headers)
+
+
+def _report_fines_revenue(export: str | None):
+    # Sum fines revenue (R300), excluding client fund flagged entries
+    total = db.session.query(db.func.coalesce(db.func.sum(JournalLine.credit - JournalLine.debit), 0)).\
+        join(Account, JournalLine.account_id == Account.id).\
+        join(JournalEntry, JournalLine.entry_id == JournalEntry.id).\
+        filter(Account.code == 'R300', JournalEntry.is_client_fund.is_(False)).scalar() or 0
+    headers = [_('Metric'), _('Amount (OMR)')]
+    return render_template('accounting/reports.html', report_type='fines_revenue', table=[[str(_('Fines Revenue')), float(total)]], headers=headers)
+
+
+def _report_customer_statement(export: str | None):
+    # Detailed statement for a single customer
+    try:
+        customer_id = int(request.args.get('customer_id'))
+    except Exception:
+        customer_id = None
+    if not customer_id:
+        return render_template('accounting/reports.html', report_type='customer_statement', table=[], headers=[_('Date'), _('Description'), _('Debit'), _('Credit'), _('Balance')])
+    rows = []
+    balance = Decimal('0')
+    # One invoice+payment join (flat rows, payments follow their invoice) instead of a payment query per invoice
+    pairs = (
+        db.session.query(Invoice, Payment)
+        .outerjoin(Payment, Payment.invoice_id == Invoice.id)
+        .filter(Invoice.customer_id == customer_id)
+        .order_by(Invoice.created_at.asc(), Invoice.id.asc(), Payment.received_at.asc(), Payment.id.asc())
+        .all()
+    )
+    current_invoice_id = None
+    for inv, p in pairs:
+        if inv.id != current_invoice_id:
+            current_invoice_id = inv.id
+            amt = _to_decimal(inv.total_omr)
             balance += amt
             rows.append([inv.created_at.strftime('%Y-%m-%d') if inv.created_at else '', f"Invoice {inv.invoice_number}", float(amt), 0.0, float(balance)])
-            pays = db.session.query(Payment).filter(Payment.invoice_id == inv.id).order_by(Payment.received_at.asc()).all()
-            for p in pays:
-                val = Decimal(str(p.amount_omr or 0))
-                balance -= val
-                rows.append([p.received_at.strftime('%Y-%m-%d') if p.received_at else '', f"Payment {p.reference or ''}", 0.0, float(val), float(balance)])
-        headers = [_('Date'), _('Description'), _('Debit'), _('Credit'), _('Balance')]
-        return render_template('accounting/reports.html', report_type='customer_statement', table=rows, headers=headers)
-
-    # default monthly P&L chart
-    return render_template('accounting/reports.html', report_type='monthly', chart={"months": labels, "revenue": revenue, "expenses": expenses})
+        if p is not None:
+            val = _to_decimal(p.amount_omr)
+            balance -= val
+            rows.append([p.received_at.strftime('%Y-%m-%d') if p.received_at else '', f"Payment {p.reference or ''}", 0.0, float(val), float(balance)])
+    headers = [_('Date'), _('Description'), _('Debit'), _('Credit'), _('Balance')]
+    return render_template('accounting/reports.html', report_type='customer_statement', table=rows, headers=headers)
+
+
+# One handler per ?type=; unknown types fall back to the monthly P&L
+_REPORT_HANDLERS = {
+    'monthly': _report_monthly,
+    'by_client': _report_by_client,
+    'taxes': _report_taxes,
+    'balance_sheet': _report_balance_sheet,
+    'trial_balance': _report_trial_balance,
+    'general_ledger': _report_general_ledger,
+    'cash_flow': _report_cash_flow,
+    'ar_aging': _report_ar_aging,
+    'inventory_by_vehicle': _report_inventory_by_vehicle,
+    'fines_revenue': _report_fines_revenue,
+    'customer_statement': _report_customer_statement,
+}
+
+
+@acct_bp.route('/reports')
+@role_required('accountant', 'admin')
+def reports():
+    handler = _REPORT_HANDLERS.get(request.args.get('type', 'monthly'), _report_monthly)
+    return handler(request.args.get('export'))
 
 
 # Accounting Settings (Accountant scope)
@@ -1571,22 +2225,26 @@ def accounts_list():
 @acct_bp.route('/vehicles')
 @role_required('accountant', 'admin')
 def vehicles_list():
-    q = db.session.query(Vehicle).order_by(Vehicle.created_at.desc()).limit(200)
+    # the list shows each vehicle's owner: load it in the same query instead of once per row
+    q = db.session.query(Vehicle).options(joinedload(Vehicle.owner)).order_by(Vehicle.created_at.desc())
     client_id = request.args.get('client_id')
     if client_id:
         try:
             q = q.filter(Vehicle.owner_customer_id == int(client_id))
         except Exception:
             pass
-    vehicles = q.all()
-    # Precompute running balances from journal per vehicle
-    balances = {}
-    for v in vehicles:
-        total = db.session.query(db.func.coalesce(db.func.sum(JournalLine.debit - JournalLine.credit), 0)).\
-            join(Account, JournalLine.account_id == Account.id).\
-            join(JournalEntry, JournalLine.entry_id == JournalEntry.id).\
-            filter(JournalEntry.vehicle_id == v.id).scalar() or 0
-        balances[v.id] = float(total)
+    vehicles = q.limit(200).all()
+    # Running balances from the journal for all listed vehicles in one grouped query
+    balance_rows = (
+        db.session.query(JournalEntry.vehicle_id, db.func.sum(JournalLine.debit - JournalLine.credit))
+        .select_from(JournalLine)
+        .join(Account, JournalLine.account_id == Account.id)
+        .join(JournalEntry, JournalLine.entry_id == JournalEntry.id)
+        .filter(JournalEntry.vehicle_id.in_([v.id for v in vehicles]))
+        .group_by(JournalEntry.vehicle_id)
+        .all()
+    ) if vehicles else []
+    balances = {vehicle_id: float(total or 0) for vehicle_id, total in balance_rows}
     return render_template('accounting/vehicles_list.html', vehicles=vehicles, balances=balances)
 
 
@@ -1643,7 +2301,7 @@ def vehicle_statement(vehicle_id: int):
         if codes:
             q = q.filter(Account.code.in_(codes))
         else:
-            q = q.filter(Account.code.like(f"{default_prefix}%"))
+            q = q.filter(Account.root_code == default_prefix)
         return float(q.scalar() or 0)
 
     totals = {
@@ -1769,6 +2427,20 @@ def vehicle_statement_add_payment(vehicle_id: int):
     return redirect(url_for('acct.vehicle_statement', vehicle_id=vehicle_id))
 
 
+def _vehicle_statement_pdf_fingerprint(v: Vehicle, statement: list[dict], totals: dict) -> str:
+    """Hash everything the vehicle statement PDF template renders (including locale)."""
+    parts = [
+        str(get_locale()), v.vin, v.owner.display_name if v.owner else '-',
+        v.auction.lot_number if v.auction else '-',
+    ]
+    parts.extend(
+        f"{r['date']}|{r['description']}|{r['account_code']}|{r['account_name']}|{r['debit']:.3f}|{r['credit']:.3f}|{r['balance']:.3f}"
+        for r in statement
+    )
+    parts.extend(f"{key}|{val:.3f}" for key, val in sorted(totals.items()))
+    return hashlib.sha256("\n".join(str(p) for p in parts).encode('utf-8')).hexdigest()
+
+
 @acct_bp.route('/vehicles/<int:vehicle_id>/statement.pdf')
 @role_required('accountant', 'admin')
 def vehicle_statement_pdf(vehicle_id: int):
@@ -1799,9 +2471,9 @@ def vehicle_statement_pdf(vehicle_id: int):
             'credit': cr_f,
             'balance': running,
         })
+    vas = db.session.query(VehicleAccountStructure).filter_by(vehicle_id=vehicle_id).first()
     def sum_kind(kind: str, default_prefix: str) -> float:
         codes = []
-        vas = db.session.query(VehicleAccountStructure).filter_by(vehicle_id=vehicle_id).first()
         if vas:
             code_val = {
                 'auction': vas.auction_account_code,
@@ -1820,7 +2492,7 @@ def vehicle_statement_pdf(vehicle_id: int):
         if codes:
             q = q.filter(Account.code.in_(codes))
         else:
-            q = q.filter(Account.code.like(f"{default_prefix}%"))
+            q = q.filter(Account.root_code == default_prefix)
         return float(q.scalar() or 0)
     totals = {
         'auction_cost_omr': sum_kind('auction', 'A150'),
@@ -1830,7 +2502,15 @@ def vehicle_statement_pdf(vehicle_id: int):
         'deposit_net_omr': sum_kind('deposit', 'L200'),
     }
     totals['outstanding_balance_omr'] = statement[-1]['balance'] if statement else 0.0
+    fingerprint = _vehicle_statement_pdf_fingerprint(v, statement, totals)
+    # Reuse the stored PDF while its inputs are unchanged: no render, upload or DB write
+    if v.statement_pdf_path and v.statement_pdf_fingerprint == fingerprint:
+        return redirect(v.statement_pdf_path)
     path = render_vehicle_statement_pdf(v, statement, totals)
+    if path:
+        v.statement_pdf_path = path
+        v.statement_pdf_fingerprint = fingerprint
+        db.session.commit()
     return redirect(path)
 
 
@@ -1843,7 +2523,6 @@ def api_vehicle_statement(vehicle_id: int):
     if not v:
         return jsonify({'error': 'not found'}), 404
     try:
-        from flask_login import current_user
         is_staff = bool(getattr(current_user, 'role', None) and getattr(current_user.role, 'name', '').lower() in {'admin','employee','accountant'})
         is_owner = False
         if getattr(current_user, 'id', None):
@@ -1901,7 +2580,7 @@ def api_vehicle_statement(vehicle_id: int):
         if codes:
             q = q.filter(Account.code.in_(codes))
         else:
-            q = q.filter(Account.code.like(f"{default_prefix}%"))
+            q = q.filter(Account.root_code == default_prefix)
         return float(q.scalar() or 0)
 
     totals = {
@@ -1927,7 +2606,6 @@ def api_vehicle_statement(vehicle_id: int):
 def api_client_vehicles_summary(client_id: int):
     # staff or the client itself
     try:
-        from flask_login import current_user
         is_staff = bool(getattr(current_user, 'role', None) and getattr(current_user.role, 'name', '').lower() in {'admin','employee','accountant'})
         is_self = False
         if getattr(current_user, 'id', None):
@@ -2034,7 +2712,7 @@ def client_view():
             db.session.query(JournalEntry.entry_date, JournalEntry.description, JournalLine.debit, JournalLine.credit)
             .join(JournalLine, JournalLine.entry_id == JournalEntry.id)
             .join(Account, JournalLine.account_id == Account.id)
-            .filter(JournalEntry.customer_id == customer.id, JournalEntry.is_client_fund.is_(True), Account.code.like('A100%'))
+            .filter(JournalEntry.customer_id == customer.id, JournalEntry.is_client_fund.is_(True), Account.root_code == 'A100')
             .order_by(JournalEntry.entry_date.asc())
             .all()
         )
@@ -2049,7 +2727,7 @@ def client_view():
             db.session.query(JournalEntry.entry_date, JournalEntry.description, JournalLine.debit, JournalLine.credit)
             .join(JournalLine, JournalLine.entry_id == JournalEntry.id)
             .join(Account, JournalLine.account_id == Account.id)
-            .filter(JournalEntry.customer_id == customer.id, JournalEntry.is_client_fund.is_(False), Account.code.like('R%'))
+            .filter(JournalEntry.customer_id == customer.id, JournalEntry.is_client_fund.is_(False), Account.code_class == 'R')
             .order_by(JournalEntry.entry_date.asc())
             .all()
         )
@@ -2059,73 +2737,58 @@ def client_view():
             'amount': float(cr or 0) - float(dr or 0),
         } for dt, desc, dr, cr in srv_rows]
 
-        # Balances
-        balances['deposits'] = float(
-            db.session.query(db.func.coalesce(db.func.sum(JournalLine.credit - JournalLine.debit), 0))
-            .join(Account, JournalLine.account_id == Account.id)
-            .join(JournalEntry, JournalLine.entry_id == JournalEntry.id)
-            .filter(JournalEntry.customer_id == customer.id, Account.code == dep_code)
-            .scalar() or 0
-        )
-        # Receivables: sum of AR account for this client
+        # Balances and mini P&L: one pass over this client's journal lines with conditional sums
+        # instead of one scan per figure
         ar_code = cas.receivable_account_code if cas else 'A300'
-        balances['ar'] = float(
-            db.session.query(db.func.coalesce(db.func.sum(JournalLine.debit - JournalLine.credit), 0))
-            .join(Account, JournalLine.account_id == Account.id)
-            .join(JournalEntry, JournalLine.entry_id == JournalEntry.id)
-            .filter(JournalEntry.customer_id == customer.id, Account.code == ar_code)
-            .scalar() or 0
-        )
-        # Paid total: net cash movements for this client (A100) excluding client fund
-        balances['paid'] = float(
-            db.session.query(db.func.coalesce(db.func.sum(JournalLine.debit - JournalLine.credit), 0))
-            .join(Account, JournalLine.account_id == Account.id)
-            .join(JournalEntry, JournalLine.entry_id == JournalEntry.id)
-            .filter(JournalEntry.customer_id == customer.id, Account.code.like('A100%'), JournalEntry.is_client_fund.is_(False))
-            .scalar() or 0
-        )
-        # Commission earned: revenue for this client excluding client fund
-        balances['revenue'] = float(
-            db.session.query(db.func.coalesce(db.func.sum(JournalLine.credit - JournalLine.debit), 0))
+        credit_net = JournalLine.credit - JournalLine.debit
+        debit_net = JournalLine.debit - JournalLine.credit
+        not_client_fund = JournalEntry.is_client_fund.is_(False)
+        deposits_sum, ar_sum, paid_sum, revenue_sum, logistics_sum = (
+            db.session.query(
+                # Deposit account balance
+                db.func.coalesce(db.func.sum(db.case((Account.code == dep_code, credit_net), else_=0)), 0),
+                # Receivables: AR account for this client
+                db.func.coalesce(db.func.sum(db.case((Account.code == ar_code, debit_net), else_=0)), 0),
+                # Paid total: net cash movements for this client (A100) excluding client fund
+                db.func.coalesce(db.func.sum(db.case((db.and_(Account.root_code == 'A100', not_client_fund), debit_net), else_=0)), 0),
+                # Commission earned: revenue for this client excluding client fund
+                db.func.coalesce(db.func.sum(db.case((db.and_(Account.code_class == 'R', not_client_fund), credit_net), else_=0)), 0),
+                # Logistics expense: sum of client's E200-Cxxxxx and E210-Cxxxxx if used
+                db.func.coalesce(db.func.sum(db.case((
+                    db.and_(Account.code.in_([log_code, log_code.replace('E200', 'E210')]), not_client_fund), debit_net,
+                ), else_=0)), 0),
+            )
             .join(Account, JournalLine.account_id == Account.id)
             .join(JournalEntry, JournalLine.entry_id == JournalEntry.id)
-            .filter(JournalEntry.customer_id == customer.id, Account.code.like('R%'), JournalEntry.is_client_fund.is_(False))
-            .scalar() or 0
+            .filter(JournalEntry.customer_id == customer.id)
+            .one()
         )
+        balances['deposits'] = float(deposits_sum)
+        balances['ar'] = float(ar_sum)
+        balances['paid'] = float(paid_sum)
+        balances['revenue'] = float(revenue_sum)
         # Mini P&L
         pl['revenue'] = balances['revenue']
-        # Logistics expense: sum of client's E200-Cxxxxx and E210-Cxxxxx if used
-        log_total = db.session.query(db.func.coalesce(db.func.sum(JournalLine.debit - JournalLine.credit), 0)).\
-            join(Account, JournalLine.account_id == Account.id).\
-            join(JournalEntry, JournalLine.entry_id == JournalEntry.id).\
-            filter(JournalEntry.customer_id == customer.id, db.or_(Account.code == log_code, Account.code == (log_code.replace('E200', 'E210'))), JournalEntry.is_client_fund.is_(False)).\
-            scalar() or 0
-        pl['logistics'] = float(log_total)
+        pl['logistics'] = float(logistics_sum)
 
     export = (request.args.get('export') or '').strip().lower()
     if export in {'pdf','xlsx'} and customer:
         # Reuse existing reports export styles (customer_statement) if needed; for brevity, export the ledger
         if export == 'xlsx':
-            from openpyxl import Workbook
-            from io import BytesIO
-            wb = Workbook(); ws = wb.active; ws.title = 'Client Statement'
+            wb, ws = _write_only_workbook('Client Statement')
             ws.append(['Date','Description','Debit','Credit'])
             for row in ledger:
                 ws.append([row['date'], row['desc'], row['debit'], row['credit']])
-            buf = BytesIO(); wb.save(buf); buf.seek(0)
+            buf = _export_buffer(); wb.save(buf); buf.seek(0)
             return send_file(buf, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', as_attachment=True, download_name='client_statement.xlsx')
         if export == 'pdf':
-            from io import BytesIO
             from reportlab.lib.pagesizes import A4
             from reportlab.pdfgen import canvas
-            buf = BytesIO(); c = canvas.Canvas(buf, pagesize=A4)
+            buf = _export_buffer(); c = canvas.Canvas(buf, pagesize=A4)
             width, height = A4; y = height - 40
-            c.setFont('Helvetica-Bold', 16); c.drawString(40, y, f"Client Statement - {customer.display_name}"); y -= 20
-            c.setFont('Helvetica', 10)
-            for row in ledger:
-                if y < 40:
-                    c.showPage(); y = height - 40; c.setFont('Helvetica', 10)
-                c.drawString(40, y, row['date']); c.drawString(120, y, row['desc'][:60]); c.drawRightString(450, y, f"{row['debit']:.3f}"); c.drawRightString(550, y, f"{row['credit']:.3f}"); y -= 12
+            c.setFont('Helvetica-Bold', 16); c.drawString(40, y, f"Client Statement - {customer.display_name}")
+            cells = [(row['date'], row['desc'][:60], f"{row['debit']:.3f}", f"{row['credit']:.3f}") for row in ledger]
+            _draw_pdf_rows(c, y - 20, height - 40, cells, ((40, False), (120, False), (450, True), (550, True)), 12)
             c.showPage(); c.save(); buf.seek(0)
             return send_file(buf, mimetype='application/pdf', as_attachment=True, download_name='client_statement.pdf')
 
@@ -2198,7 +2861,6 @@ def client_view_add_entry():
 
         elif entry_type in {'client_fund_disbursement', 'disbursement', 'refund'}:
             # Optional trace row as refunded
-            from datetime import datetime as _dt
             dep = CustomerDeposit(
                 customer_id=customer_id,
                 vehicle_id=None,
@@ -2207,7 +2869,7 @@ def client_view_add_entry():
                 method=method,
                 reference=reference or description or None,
                 status='refunded',
-                refunded_at=_dt.utcnow(),
+                refunded_at=_now(),
             )
             db.session.add(dep)
             _post_journal(
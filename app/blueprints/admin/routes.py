@@ -4,6 +4,7 @@ from flask_login import login_required, current_user
 from ...security import role_required
 from ...extensions import db
 from ...utils.audit import log_action
+from ...utils.monthly import last_month_starts, monthly_sums_stmt, sums_by_month
 from ...models import (
     User,
     Role,
@@ -23,49 +24,65 @@ from datetime import datetime
 
 admin_bp = Blueprint("admin", __name__, template_folder="templates/admin")
 
+# Paid invoice totals by month, CAR invoices excluded (they are expenses, not revenue)
+_SERVICE_REVENUE_BY_MONTH_STMT = monthly_sums_stmt(
+    Invoice.created_at, [Invoice.total_omr], (Invoice.status == 'Paid', Invoice.invoice_type != 'CAR'),
+)
+
+# Financial report: paid invoice totals by month split into service revenue and CAR cost in one scan
+_PAID_INVOICES_BY_MONTH_STMT = monthly_sums_stmt(
+    Invoice.created_at,
+    [
+        db.case((Invoice.invoice_type != 'CAR', Invoice.total_omr), else_=0),
+        db.case((Invoice.invoice_type == 'CAR', Invoice.total_omr), else_=0),
+    ],
+    (Invoice.status == 'Paid',),
+)
+_FREIGHT_BY_MONTH_STMT = monthly_sums_stmt(Shipment.created_at, [Shipment.cost_freight_usd])
+
+def _count_of(model, *where):
+    """Scalar COUNT(*) subquery over model rows matching where."""
+    return db.select(db.func.count()).select_from(model).where(*where).scalar_subquery()
+
+
+# Dashboard cards: every count plus the month's revenue as labelled scalar subqueries of one SELECT
+_DASHBOARD_COUNTS_STMT = db.select(
+    _count_of(User).label("users"),
+    _count_of(Customer).label("customers"),
+    db.select(db.func.count(User.id)).outerjoin(Role)
+        .where(Role.name == "customer", User.active.is_(True)).scalar_subquery().label("active_customers"),
+    _count_of(Vehicle).label("vehicles"),
+    # Treat both "In Shipping" and "Shipping" as active shipping
+    _count_of(Vehicle, db.func.lower(Vehicle.status).in_(["in shipping", "shipping"])).label("vehicles_shipping"),
+    # vehicle status breakdown for admin cards
+    _count_of(Vehicle, Vehicle.status == "In Auction").label("vehicles_in_auction"),
+    _count_of(Vehicle, Vehicle.status.in_(["In Warehouse", "Arrived Warehouse"])).label("vehicles_in_warehouse"),
+    _count_of(Vehicle, Vehicle.status == "No Title").label("vehicles_no_title"),
+    # Consider vehicles that are in shipping flow as "shipped" for this card
+    _count_of(Vehicle, db.func.lower(Vehicle.status).in_(["in shipping", "shipping", "shipped", "on way"])).label("vehicles_shipped"),
+    _count_of(Auction).label("auctions"),
+    _count_of(Shipment).label("shipments"),
+    _count_of(Shipment, Shipment.status == "Open").label("open_shipments"),
+    _count_of(Invoice).label("invoices"),
+    _count_of(CostItem).label("cost_items"),
+    _count_of(AuditLog).label("audit_logs"),
+    _count_of(Backup).label("backups"),
+    # monthly revenue (current month); exclude CAR invoices from revenue, treat as expenses elsewhere
+    db.select(db.func.coalesce(db.func.sum(Invoice.total_omr), 0))
+        .where(Invoice.created_at >= db.bindparam("month_start"), Invoice.status == 'Paid', Invoice.invoice_type != 'CAR')
+        .scalar_subquery().label("revenue_omr"),
+)
+
+
 @admin_bp.route("/dashboard")
 @role_required("admin")
 def dashboard():
-    # aggregate counts for top-level entities
-    counts = {
-        "users": db.session.query(User).count(),
-        "customers": db.session.query(Customer).count(),
-        "active_customers": db.session.query(User)
-            .join(Role, isouter=True)
-            .filter(Role.name == "customer", User.active.is_(True)).count(),
-        "vehicles": db.session.query(Vehicle).count(),
-        # Treat both "In Shipping" and "Shipping" as active shipping
-        "vehicles_shipping": db.session.query(Vehicle)
-            .filter(db.func.lower(Vehicle.status).in_(["in shipping", "shipping"]))
-            .count(),
-        # vehicle status breakdown for admin cards
-        "vehicles_in_auction": db.session.query(Vehicle).filter(Vehicle.status == "In Auction").count(),
-        "vehicles_in_warehouse": db.session.query(Vehicle).filter(Vehicle.status.in_(["In Warehouse", "Arrived Warehouse"]))
-            .count(),
-        "vehicles_no_title": db.session.query(Vehicle).filter(Vehicle.status == "No Title").count(),
-        # Consider vehicles that are in shipping flow as "shipped" for this card
-        "vehicles_shipped": db.session.query(Vehicle)
-            .filter(db.func.lower(Vehicle.status).in_(["in shipping", "shipping", "shipped", "on way"]))
-            .count(),
-        "auctions": db.session.query(Auction).count(),
-        "shipments": db.session.query(Shipment).count(),
-        "open_shipments": db.session.query(Shipment).filter(Shipment.status == "Open").count(),
-        "invoices": db.session.query(Invoice).count(),
-        "cost_items": db.session.query(CostItem).count(),
-        "audit_logs": db.session.query(AuditLog).count(),
-        "backups": db.session.query(Backup).count(),
-    }
-
-    # totals
-    # monthly revenue (current month)
+    # aggregate counts for top-level entities and this month's revenue, fetched as one row
     from datetime import datetime, timedelta
     now = datetime.utcnow()
     month_start = datetime(now.year, now.month, 1)
-    # Exclude CAR invoices from revenue; treat as expenses elsewhere
-    totals = {
-        "revenue_omr": db.session.query(db.func.coalesce(db.func.sum(Invoice.total_omr), 0))
-            .filter(Invoice.created_at >= month_start, Invoice.status == 'Paid', Invoice.invoice_type != 'CAR').scalar(),
-    }
+    counts = db.session.execute(_DASHBOARD_COUNTS_STMT, {"month_start": month_start}).one()._asdict()
+    totals = {"revenue_omr": counts.pop("revenue_omr")}
 
     # recent activity lists
     recent = {
@@ -76,37 +93,9 @@ def dashboard():
         "audit_logs": db.session.query(AuditLog).order_by(AuditLog.timestamp.desc()).limit(5).all(),
     }
 
-    # charts data
-    def month_labels(n=12):
-        labels = []
-        dt = datetime(now.year, now.month, 1)
-        for i in range(n):
-            labels.append(dt.strftime("%b"))
-            # go back one month
-            if dt.month == 1:
-                dt = datetime(dt.year - 1, 12, 1)
-            else:
-                dt = datetime(dt.year, dt.month - 1, 1)
-        return list(reversed(labels))
-
-    def monthly_revenue(n=12):
-        vals = []
-        dt = datetime(now.year, now.month, 1)
-        for i in range(n):
-            start = dt
-            if dt.month == 12:
-                end = datetime(dt.year + 1, 1, 1)
-            else:
-                end = datetime(dt.year, dt.month + 1, 1)
-            total = db.session.query(db.func.coalesce(db.func.sum(Invoice.total_omr), 0))\
-                .filter(Invoice.created_at >= start, Invoice.created_at < end, Invoice.status == 'Paid', Invoice.invoice_type != 'CAR').scalar()
-            vals.append(float(total or 0))
-            # go back one month
-            if dt.month == 1:
-                dt = datetime(dt.year - 1, 12, 1)
-            else:
-                dt = datetime(dt.year, dt.month - 1, 1)
-        return list(reversed(vals))
+    # charts data: paid non-CAR invoice totals for the last 12 months, one grouped query
+    month_starts = last_month_starts(now)
+    revenue_series = sums_by_month(_SERVICE_REVENUE_BY_MONTH_STMT, month_starts)[:, 0].tolist()
 
     # shipments status breakdown
     status_counts = {s: 0 for s in ("Open", "In Transit", "Delivered")}
@@ -115,8 +104,8 @@ def dashboard():
             status_counts[status] = cnt
 
     chart = {
-        "months": month_labels(),
-        "revenue": monthly_revenue(),
+        "months": [m.strftime("%b") for m in month_starts],
+        "revenue": revenue_series,
         "shipment_status_labels": list(status_counts.keys()),
         "shipment_status_values": list(status_counts.values()),
     }
@@ -129,43 +118,27 @@ def dashboard():
 @role_required("admin")
 def reports():
     from datetime import datetime
-    from io import BytesIO
+    import tempfile
     from reportlab.lib.pagesizes import A4
     from reportlab.pdfgen import canvas
     from openpyxl import Workbook
 
-    # compute monthly financials
+    # compute monthly financials, oldest month first
     now = datetime.utcnow()
-    labels = []
-    revenue = []
-    expenses = []
-    dt = datetime(now.year, now.month, 1)
-    for month_index in range(12):
-        start = dt
-        end = datetime(dt.year + 1, 1, 1) if dt.month == 12 else datetime(dt.year, dt.month + 1, 1)
-        labels.append(dt.strftime("%b %Y"))
-        rev = db.session.query(db.func.coalesce(db.func.sum(Invoice.total_omr), 0)).filter(Invoice.created_at >= start, Invoice.created_at < end, Invoice.status == 'Paid', Invoice.invoice_type != 'CAR').scalar() or 0
-        # approximate expenses in OMR from USD-based costs (freight + cost items)
-        usd_to_omr = 0.385
-        freight = db.session.query(db.func.coalesce(db.func.sum(Shipment.cost_freight_usd), 0)).filter(Shipment.created_at >= start, Shipment.created_at < end).scalar() or 0
-        costs = db.session.query(db.func.coalesce(db.func.sum(CostItem.amount_usd), 0)).filter(CostItem.id.isnot(None)).scalar() or 0
-        car_cost = db.session.query(db.func.coalesce(db.func.sum(Invoice.total_omr), 0)).\
-            filter(Invoice.created_at >= start, Invoice.created_at < end, Invoice.status == 'Paid', Invoice.invoice_type == 'CAR').scalar() or 0
-        exp = (float(freight) + float(costs)) * usd_to_omr + float(car_cost or 0)
-        revenue.append(float(rev))
-        expenses.append(float(exp))
-        # previous month
-        if dt.month == 1:
-            dt = datetime(dt.year - 1, 12, 1)
-        else:
-            dt = datetime(dt.year, dt.month - 1, 1)
-    labels = list(reversed(labels))
-    revenue = list(reversed(revenue))
-    expenses = list(reversed(expenses))
+    month_starts = last_month_starts(now)
+    labels = [dt.strftime("%b %Y") for dt in month_starts]
+    paid = sums_by_month(_PAID_INVOICES_BY_MONTH_STMT, month_starts)
+    freight = sums_by_month(_FREIGHT_BY_MONTH_STMT, month_starts)[:, 0]
+    # approximate expenses in OMR from USD-based costs (freight + cost items)
+    usd_to_omr = 0.385
+    costs = float(db.session.query(db.func.coalesce(db.func.sum(CostItem.amount_usd), 0)).filter(CostItem.id.isnot(None)).scalar() or 0)
+    revenue = paid[:, 0].tolist()
+    expenses = ((freight + costs) * usd_to_omr + paid[:, 1]).tolist()
 
     export = request.args.get("export")
     if export == "pdf":
-        buf = BytesIO()
+        # Spooled: stays in memory for small reports, spills to a temp file past 1 MiB
+        buf = tempfile.SpooledTemporaryFile(max_size=1_048_576)
         c = canvas.Canvas(buf, pagesize=A4)
         width, height = A4
         y = height - 50
@@ -197,11 +170,11 @@ def reports():
         buf.seek(0)
         return send_file(buf, mimetype="application/pdf", as_attachment=True, download_name="financial_report.pdf")
     elif export == "xlsx":
-        wb = Workbook(); ws = wb.active; ws.title = "Financials"
+        wb = Workbook(write_only=True); ws = wb.create_sheet("Financials")
         ws.append(["Month", "Revenue (OMR)", "Expenses (OMR)", "Profit (OMR)"])
         for m, r, e in zip(labels, revenue, expenses):
             ws.append([m, r, e, r - e])
-        buf = BytesIO(); wb.save(buf); buf.seek(0)
+        buf = tempfile.SpooledTemporaryFile(max_size=1_048_576); wb.save(buf); buf.seek(0)
         return send_file(buf, mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", as_attachment=True, download_name="financial_report.xlsx")
 
     return render_template("admin/reports.html", chart={"months": labels, "revenue": revenue, "expenses": expenses})
@@ -246,14 +219,14 @@ def settings():
 @admin_bp.route("/activity")
 @role_required("admin")
 def activity_log():
-    from io import BytesIO
+    import tempfile
     from reportlab.lib.pagesizes import A4
     from reportlab.pdfgen import canvas
 
     export = request.args.get("export")
     logs = db.session.query(AuditLog).order_by(AuditLog.timestamp.desc()).limit(200).all()
     if export == "pdf":
-        buf = BytesIO(); c = canvas.Canvas(buf, pagesize=A4)
+        buf = tempfile.SpooledTemporaryFile(max_size=1_048_576); c = canvas.Canvas(buf, pagesize=A4)
         width, height = A4
         y = height - 40
         c.setFont("Helvetica-Bold", 16); c.drawString(40, y, "Activity Log")
@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, request, jsonify, current_app, redirect, url_for, flash, abort, send_file
+from flask import Blueprint, Response, render_template, request, jsonify, current_app, redirect, url_for, flash, abort, send_file
 from flask_babel import gettext as _
 from flask_login import login_required
 from ...security import role_required
@@ -25,9 +25,22 @@ from ...models import (
 )
 from datetime import datetime
 from collections import defaultdict
+from sqlalchemy.orm import joinedload
+from ...utils.monthly import last_month_starts, sums_by_month, year_month
+from ...utils.numbering import next_document_number
 from ...utils.storage import save_file_to_storage
 
 ops_bp = Blueprint("ops", __name__, template_folder="templates/operations")
+
+# Dashboard chart: distinct vehicles on shipments departing in each month since :since
+_SHIPPED_BY_MONTH_STMT = (
+    db.select(year_month(Shipment.departure_date), db.func.count(db.distinct(Vehicle.id)))
+    .join(VehicleShipment, Vehicle.id == VehicleShipment.vehicle_id)
+    .join(Shipment, Shipment.id == VehicleShipment.shipment_id)
+    .where(Shipment.departure_date >= db.bindparam('since'))
+    .group_by(year_month(Shipment.departure_date))
+)
+
 # Regions suggest endpoint for searchable dropdown (Operations UI)
 @ops_bp.get('/shipping/regions.json')
 @role_required('employee', 'admin')
@@ -184,32 +197,9 @@ def dashboard():
     customers_count = db.session.query(Customer).count()
 
     # Monthly shipped cars (last 12 months)
-    now = datetime.utcnow()
-    month_labels = []
-    shipped_counts = []
-    dt = datetime(now.year, now.month, 1)
-    months = []
-    for month_index in range(12):
-        start = dt
-        end = datetime(dt.year + 1, 1, 1) if dt.month == 12 else datetime(dt.year, dt.month + 1, 1)
-        months.append((start, end, start.strftime("%b")))
-        # previous month
-        if dt.month == 1:
-            dt = datetime(dt.year - 1, 12, 1)
-        else:
-            dt = datetime(dt.year, dt.month - 1, 1)
-    months = list(reversed(months))
-    for start, end, label in months:
-        count = (
-            db.session.query(db.func.count(db.distinct(Vehicle.id)))
-            .join(VehicleShipment, Vehicle.id == VehicleShipment.vehicle_id)
-            .join(Shipment, Shipment.id == VehicleShipment.shipment_id)
-            .filter(Shipment.departure_date >= start, Shipment.departure_date < end)
-            .scalar()
-            or 0
-        )
-        month_labels.append(label)
-        shipped_counts.append(int(count))
+    month_starts = last_month_starts(datetime.utcnow())
+    month_labels = [m.strftime("%b") for m in month_starts]
+    shipped_counts = [int(n) for n in sums_by_month(_SHIPPED_BY_MONTH_STMT, month_starts)[:, 0]]
 
     # Recent vehicles
     recent_vehicles = db.session.query(Vehicle).order_by(Vehicle.created_at.desc()).limit(5).all()
@@ -614,8 +604,8 @@ def warehouse_assign_vehicle(warehouse_id: int):
     elif not title_received_flag:
         vehicle.title_tracking_number = None
     vehicle.has_title = has_title_flag or title_received_flag or vehicle.has_title
+    timestamp = int(datetime.utcnow().timestamp())
     for idx, photo in enumerate(arrival_photos):
-        timestamp = int(datetime.utcnow().timestamp())
         saved = save_uploaded_file(vehicle.vin or f"vehicle_{vehicle.id}", photo, filename_hint=f"warehouse_arrival_{warehouse.id}_{timestamp}_{idx}")
         if saved:
             db.session.add(Document(vehicle_id=vehicle.id, doc_type='Warehouse Arrival Photo', file_path=saved))
@@ -836,18 +826,18 @@ def cars_new():
             usd_to_omr = float(current_app.config.get('OMR_EXCHANGE_RATE', 0.385))
             amount_omr = float(v.purchase_price_usd or 0) * usd_to_omr
             # Create an initial car invoice linked to this vehicle so the accountant dashboard
-            # correctly classifies it as a car cost once paid.
+            # correctly classifies it as a car cost once paid. The item rides on the invoice's
+            # cascade, so both rows go out in the next flush rather than an extra one here.
             inv = Invoice(
-                invoice_number=f"INV-{int(datetime.utcnow().timestamp())}",
+                invoice_number=next_document_number('INV'),
                 customer_id=v.owner_customer_id,
                 vehicle_id=v.id,
                 invoice_type='CAR',
                 status='Draft',
                 total_omr=amount_omr,
+                items=[InvoiceItem(vehicle_id=v.id, description=f"Vehicle {v.vin} purchase", amount_omr=amount_omr)],
             )
             db.session.add(inv)
-            db.session.flush()
-            db.session.add(InvoiceItem(invoice_id=inv.id, vehicle_id=v.id, description=f"Vehicle {v.vin} purchase", amount_omr=amount_omr))
 
         # Optional cost: shipping price (OMR in InternationalCost)
         try:
@@ -1039,22 +1029,31 @@ def cars_upload(vehicle_id: int):
     return ("", 204)
 
 
+def _csv_download(filename: str, header: list, rows) -> Response:
+    """Stream a UTF-8 (with BOM, for Excel) CSV download in ~64 KiB chunks instead of building it whole."""
+    import csv
+    from io import StringIO
+
+    def generate():
+        buf = StringIO(); w = csv.writer(buf)
+        buf.write('\ufeff'); w.writerow(header)
+        for row in rows:
+            w.writerow(row)
+            if buf.tell() >= 65536:
+                yield buf.getvalue().encode('utf-8')
+                buf.seek(0); buf.truncate()
+        yield buf.getvalue().encode('utf-8')
+
+    return Response(generate(), mimetype='text/csv', headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+
 @ops_bp.route('/cars/export.csv')
 @role_required('employee', 'admin')
 def cars_export():
-    import csv
-    from io import StringIO
-    rows = db.session.query(Vehicle).order_by(Vehicle.created_at.desc()).all()
-    buf = StringIO(); w = csv.writer(buf)
-    w.writerow(['VIN','Make','Model','Year','Client','Status'])
-    for v in rows:
-        w.writerow([v.vin, v.make, v.model, v.year or '', (v.owner.display_name if v.owner else ''), v.status])
-    buf.seek(0)
-    from flask import send_file
-    from io import BytesIO
-    b = BytesIO(buf.read().encode('utf-8-sig'))
-    b.seek(0)
-    return send_file(b, mimetype='text/csv', as_attachment=True, download_name='cars.csv')
+    # Owners load with the vehicles, so the streamed rows need no further queries
+    vehicles = db.session.query(Vehicle).options(joinedload(Vehicle.owner)).order_by(Vehicle.created_at.desc()).all()
+    rows = ([v.vin, v.make, v.model, v.year or '', (v.owner.display_name if v.owner else ''), v.status] for v in vehicles)
+    return _csv_download('cars.csv', ['VIN','Make','Model','Year','Client','Status'], rows)
 
 
 # Shipments Management
@@ -1078,7 +1077,7 @@ def shipments_new():
     warehouses = db.session.query(Warehouse).order_by(Warehouse.name.asc()).all()
     if request.method == 'POST':
         s = Shipment(
-            shipment_number=(request.form.get('shipment_number') or f"SHP-{int(datetime.utcnow().timestamp())}"),
+            shipment_number=(request.form.get('shipment_number') or next_document_number('SHP')),
             type=request.form.get('type') or None,
             origin_port=request.form.get('origin_port') or None,
             destination_port=request.form.get('destination_port') or None,
@@ -1234,22 +1233,20 @@ def shipments_delete_doc(shipment_id: int, doc_id: int):
 @ops_bp.route('/shipments/export.csv')
 @role_required('employee', 'admin')
 def shipments_export():
-    import csv
-    from io import StringIO, BytesIO
-    rows = db.session.query(Shipment).order_by(Shipment.created_at.desc()).all()
-    buf = StringIO(); w = csv.writer(buf)
-    w.writerow(['Shipment No','Type','Port From','Port To','Departure','Arrival','Status','Cars'])
-    for s in rows:
-        cars_cnt = db.session.query(VehicleShipment).filter_by(shipment_id=s.id).count()
-        w.writerow([
+    shipments = db.session.query(Shipment).order_by(Shipment.created_at.desc()).all()
+    cars_by_shipment = dict(
+        db.session.query(VehicleShipment.shipment_id, db.func.count(VehicleShipment.id))
+        .group_by(VehicleShipment.shipment_id).all()
+    )
+    rows = (
+        [
             s.shipment_number, s.type, s.origin_port, s.destination_port,
             (s.departure_date.strftime('%Y-%m-%d') if s.departure_date else ''),
-            (s.arrival_date.strftime('%Y-%m-%d') if s.arrival_date else ''), s.status, cars_cnt
-        ])
-    buf.seek(0)
-    from flask import send_file
-    b = BytesIO(buf.read().encode('utf-8-sig')); b.seek(0)
-    return send_file(b, mimetype='text/csv', as_attachment=True, download_name='shipments.csv')
+            (s.arrival_date.strftime('%Y-%m-%d') if s.arrival_date else ''), s.status, cars_by_shipment.get(s.id, 0)
+        ]
+        for s in shipments
+    )
+    return _csv_download('shipments.csv', ['Shipment No','Type','Port From','Port To','Departure','Arrival','Status','Cars'], rows)
 
 
 # Customers Management
@@ -26,7 +26,19 @@ class Config:
     MAIL_PORT = int(os.getenv("MAIL_PORT", 25) or 25)
     MAIL_USERNAME = os.getenv("MAIL_USERNAME")
     MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
+    # Seconds an email view waits for the send before answering "queued" (failures still reach the audit log)
+    MAIL_SEND_TIMEOUT = int(os.getenv("MAIL_SEND_TIMEOUT", 20))
     OMR_EXCHANGE_RATE = float(os.getenv("OMR_EXCHANGE_RATE", 0.385))
+    # Seconds the latest ExchangeRate row is reused before it is read again (0 disables)
+    EXCHANGE_RATE_CACHE_TTL = int(os.getenv("EXCHANGE_RATE_CACHE_TTL", 60))
+    # Seconds report figures may be served from the per-process memo (0, the default, disables it).
+    # Writes only invalidate the memo of the process that made them, so with several workers a
+    # report can lag another worker's payment by up to this many seconds
+    REPORT_CACHE_TTL = int(os.getenv("REPORT_CACHE_TTL", 0))
+    # Have a fronting Apache (mod_xsendfile) or lighttpd serve files sent by path via the X-Sendfile
+    # header. Apache/lighttpd only: nginx needs X-Accel-Redirect and ignores X-Sendfile, so enabling
+    # this behind nginx makes those downloads come back empty
+    USE_X_SENDFILE = os.getenv("USE_X_SENDFILE", "").lower() in ("1", "true", "yes")
     B2_BUCKET_NAME = os.getenv("B2_BUCKET_NAME")
     B2_ENDPOINT = os.getenv("B2_ENDPOINT")
     B2_KEY_ID = os.getenv("B2_KEY_ID")
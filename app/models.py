@@ -1,5 +1,6 @@
 from .extensions import db
 from flask_login import UserMixin
+from sqlalchemy.orm import validates
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 from decimal import Decimal
@@ -172,6 +173,9 @@ class Vehicle(db.Model):
     warehouse_title_received_at = db.Column(db.DateTime)
     shipping_tracking_url = db.Column(db.Text)
     title_tracking_number = db.Column(db.String(120))
+    statement_pdf_path = db.Column(db.Text)
+    # Hash of the data statement_pdf_path was rendered from; lets statement exports reuse the stored PDF
+    statement_pdf_fingerprint = db.Column(db.String(64))
     # Public sharing fields
     share_token: Optional[str] = db.Column(db.String(64), unique=True, index=True)
     share_enabled: bool = db.Column(db.Boolean, default=False, nullable=False)
@@ -181,6 +185,11 @@ class Vehicle(db.Model):
     warehouse = db.relationship("Warehouse", backref="vehicles")
     cost_items = db.relationship("CostItem", backref="vehicle")
 
+    __table_args__ = (
+        # Case-insensitive VIN lookups (upper(vin) = upper(:vin)) seek instead of scanning
+        db.Index("ix_vehicles_vin_upper", db.func.upper(vin)),
+    )
+
 class Shipment(db.Model):
     __tablename__ = "shipments"
     id = db.Column(db.Integer, primary_key=True)
@@ -193,11 +202,13 @@ class Shipment(db.Model):
     status = db.Column(db.String(50))
     cost_freight_usd = db.Column(db.Numeric(12,2))
     cost_insurance_usd = db.Column(db.Numeric(12,2))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     shipping_company = db.Column(db.String(200))
     container_number = db.Column(db.String(100))
     origin_warehouse_id = db.Column(db.Integer, db.ForeignKey("warehouses.id"), index=True)
     origin_warehouse = db.relationship("Warehouse", backref="shipments_origin", foreign_keys=[origin_warehouse_id])
+    # Read-only view of the vehicles linked through vehicle_shipments (writes go through VehicleShipment)
+    vehicles = db.relationship("Vehicle", secondary="vehicle_shipments", viewonly=True)
 
 class VehicleShipment(db.Model):
     __tablename__ = "vehicle_shipments"
@@ -213,6 +224,10 @@ class CostItem(db.Model):
     amount_usd = db.Column(db.Numeric(12,2))
     description = db.Column(db.Text)
 
+# Shared counter for generated invoice/BOL numbers (only materialised on PostgreSQL)
+document_number_seq = db.Sequence("document_number_seq", metadata=db.metadata)
+
+
 class Invoice(db.Model):
     __tablename__ = "invoices"
     id = db.Column(db.Integer, primary_key=True)
@@ -225,7 +240,9 @@ class Invoice(db.Model):
     total_omr = db.Column(db.Numeric(12,3))
     status = db.Column(db.String(50))
     pdf_path = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Hash of the data pdf_path was rendered from; lets exports reuse the stored PDF
+    pdf_fingerprint = db.Column(db.String(64))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     customer = db.relationship("Customer")
     vehicle = db.relationship("Vehicle")
     items = db.relationship("InvoiceItem", backref="invoice", cascade="all, delete-orphan")
@@ -233,6 +250,13 @@ class Invoice(db.Model):
     # Optional exchange rate used for this invoice (e.g., fines converted from USD)
     exchange_rate_id = db.Column(db.Integer, db.ForeignKey("exchange_rates.id"), nullable=True)
 
+    __table_args__ = (
+        # Covers the dashboard's paid-CAR SUM(total_omr) without touching the heap
+        db.Index("ix_invoices_status_type_total", "status", "invoice_type", "total_omr"),
+        # A vehicle's invoices newest first, as the by-VIN lookup reads them
+        db.Index("ix_invoices_vehicle_created", "vehicle_id", "created_at", "id"),
+    )
+
     def calculate_total(self) -> Decimal:
         total = Decimal("0")
         for it in self.items or []:
@@ -314,7 +338,7 @@ class InternationalCost(db.Model):
     vat_omr = db.Column(db.Numeric(12,3))
     local_transport_omr = db.Column(db.Numeric(12,3))
     misc_omr = db.Column(db.Numeric(12,3))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     vehicle = db.relationship("Vehicle", backref=db.backref("international_cost", uselist=False))
 
@@ -333,6 +357,8 @@ class BillOfLading(db.Model):
     shipment_id = db.Column(db.Integer, db.ForeignKey("shipments.id"))
     issue_date = db.Column(db.DateTime, default=datetime.utcnow)
     pdf_path = db.Column(db.Text)
+    # Hash of the data pdf_path was rendered from; lets exports reuse the stored PDF
+    pdf_fingerprint = db.Column(db.String(64))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     shipment = db.relationship("Shipment")
@@ -445,6 +471,17 @@ class Account(db.Model):
     client_id = db.Column(db.Integer, db.ForeignKey("customers.id"), index=True)
     # Optional linkage for vehicle-specific sub-accounts
     vehicle_id = db.Column(db.Integer, db.ForeignKey("vehicles.id"), index=True)
+    # Derived from code for indexed equality filters instead of LIKE 'X%':
+    # "R300-C00001" -> code_class "R", root_code "R300"
+    code_class = db.Column(db.String(1), index=True)
+    root_code = db.Column(db.String(20), index=True)
+
+    @validates("code")
+    def _sync_code_parts(self, key, value):
+        code = (value or "").strip()
+        self.code_class = code[:1] or None
+        self.root_code = code.split("-", 1)[0] or None
+        return value
 
 
 class ExchangeRate(db.Model):
@@ -483,7 +520,15 @@ class JournalEntry(db.Model):
     auction = db.relationship("Auction")
     invoice = db.relationship("Invoice")
     approved_by = db.relationship("User", foreign_keys=[approved_by_user_id])
-    lines = db.relationship("JournalLine", backref="entry", cascade="all, delete-orphan")
+    # Lines are written through Core and reports join explicitly; a lazy load back to the entry is an N+1
+    lines = db.relationship("JournalLine", backref=db.backref("entry", lazy="raise"), cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Revenue sums filter on a date range and exclude client-fund entries
+        db.Index("ix_journal_entries_date_client_fund", "entry_date", "is_client_fund"),
+        # Keyset order for the general ledger report
+        db.Index("ix_journal_entries_date_id", "entry_date", "id"),
+    )
 
 
 class JournalLine(db.Model):
@@ -496,7 +541,15 @@ class JournalLine(db.Model):
     credit = db.Column(db.Numeric(14, 3), default=0)
     currency_code = db.Column(db.String(3), default="OMR")
 
-    account = db.relationship("Account")
+    # Reports join accounts explicitly; raise instead of lazy-loading the account per line
+    account = db.relationship("Account", lazy="raise")
+
+    __table_args__ = (
+        db.CheckConstraint("debit <> 0 OR credit <> 0", name="ck_journal_lines_nonzero"),
+        # Per-account ledger lookups and sums reach the entry and amounts without visiting the heap
+        # (INCLUDE is PostgreSQL-only; elsewhere this is the plain two-column index)
+        db.Index("ix_journal_lines_account_entry", "account_id", "entry_id", postgresql_include=["debit", "credit"]),
+    )
 
 
 class OperationalExpense(db.Model):
@@ -0,0 +1,61 @@
+from datetime import datetime
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from ..extensions import db
+
+
+class year_month(FunctionElement):
+    """'YYYY-MM' bucket of a datetime column, rendered per dialect at compile time."""
+    type = db.String()
+    inherit_cache = True
+
+
+@compiles(year_month)
+def _year_month_default(element, compiler, **kw):
+    return "strftime('%%Y-%%m', %s)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(year_month, 'postgresql')
+def _year_month_postgresql(element, compiler, **kw):
+    return "to_char(%s, 'YYYY-MM')" % compiler.process(element.clauses, **kw)
+
+
+def last_month_starts(now: datetime, count: int = 12) -> list[datetime]:
+    """Return the first day of the last `count` months, oldest first (current month last)."""
+    first = datetime(now.year, now.month, 1)
+    return [first - relativedelta(months=i) for i in range(count - 1, -1, -1)]
+
+
+def monthly_sums_stmt(date_col, sum_exprs: list, filters: tuple = (), select_from=None, joins: tuple = ()):
+    """GROUP BY month SELECT of (month, sum1, sum2, ...) for rows dated on/after the :since parameter."""
+    month_col = year_month(date_col)
+    stmt = db.select(month_col, *[db.func.sum(e) for e in sum_exprs])
+    if select_from is not None:
+        stmt = stmt.select_from(select_from)
+    for target, onclause in joins:
+        stmt = stmt.join(target, onclause)
+    return stmt.where(date_col >= db.bindparam('since'), *filters).group_by(month_col)
+
+
+def sums_by_month(stmt, month_starts: list[datetime]) -> np.ndarray:
+    """Run a monthly_sums_stmt as a (months x sums) float matrix, one row per month_starts entry.
+
+    The month keys are a CTE LEFT JOINed to the grouped sums, so empty months come back from the
+    database as zero rows in order and no Python-side alignment is needed.
+    """
+    months = db.union_all(*[
+        db.select(db.literal(dt.strftime('%Y-%m'), db.String).label('month')) for dt in month_starts
+    ]).cte('months')
+    sums = stmt.subquery()
+    month_col, *sum_cols = sums.c
+    q = (
+        db.select(*[db.func.coalesce(col, 0) for col in sum_cols])
+        .select_from(months.outerjoin(sums, month_col == months.c.month))
+        .order_by(months.c.month)
+    )
+    rows = db.session.execute(q, {'since': month_starts[0]}).all()
+    return np.array(rows, dtype=float).reshape(len(month_starts), len(sum_cols))
@@ -0,0 +1,25 @@
+import threading
+import time
+
+from ..extensions import db
+from ..models import document_number_seq
+
+# Last clock value handed out by the non-PostgreSQL fallback
+_fallback_lock = threading.Lock()
+_fallback_last = 0
+
+
+def next_document_number(prefix: str) -> str:
+    """Collision-free generated number such as CAR-0000000042.
+
+    Uses the shared DB sequence on PostgreSQL; other dialects (SQLite in tests)
+    fall back to a microsecond clock value, kept increasing within the process.
+    The fallback is for development and tests only: separate processes can still
+    draw the same value, so run multi-worker deployments on PostgreSQL.
+    """
+    global _fallback_last
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return f"{prefix}-{db.session.scalar(document_number_seq.next_value().select()):010d}"
+    with _fallback_lock:
+        _fallback_last = max(time.time_ns() // 1000, _fallback_last + 1)
+        return f"{prefix}-{_fallback_last}"
@@ -4,9 +4,14 @@ from uuid import uuid4
 from urllib.parse import urlparse
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
 from flask import current_app
 
+# Read upload streams in 1 MiB blocks (boto3 defaults to 256 KiB) so a typical
+# PDF or scan is pulled off the request stream in a handful of reads.
+_UPLOAD_TRANSFER_CONFIG = TransferConfig(io_chunksize=1024 * 1024)
+
 
 def get_s3_client():
     """Return a configured boto3 S3 client for Backblaze B2."""
@@ -67,7 +72,7 @@ def save_file_to_storage(file_obj, folder, filename_hint=None):
 
     client = get_s3_client()
     try:
-        upload_kwargs = {}
+        upload_kwargs = {"Config": _UPLOAD_TRANSFER_CONFIG}
         if extra_args:
             upload_kwargs["ExtraArgs"] = extra_args
         client.upload_fileobj(stream, bucket, key, **upload_kwargs)
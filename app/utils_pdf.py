@@ -11,8 +11,7 @@ def _render_pdf_bytes(html_string: str) -> bytes:
         return html_string.encode("utf-8")
 
 
-def _upload_pdf(filename: str, html_string: str) -> str:
-    pdf_bytes = _render_pdf_bytes(html_string)
+def _store_pdf(filename: str, pdf_bytes: bytes) -> str:
     buffer = io.BytesIO(pdf_bytes)
     buffer.seek(0)
     buffer.name = filename
@@ -20,16 +19,30 @@ def _upload_pdf(filename: str, html_string: str) -> str:
     return save_file_to_storage(buffer, folder="pdfs")
 
 
-def render_invoice_pdf(invoice, items, template="pdf/invoice.html"):
+def _upload_pdf(filename: str, html_string: str) -> str:
+    return _store_pdf(filename, _render_pdf_bytes(html_string))
+
+
+def render_invoice_pdf_with_bytes(invoice, items, template="pdf/invoice.html"):
+    """Render and upload an invoice PDF, returning (url, pdf_bytes) so callers can reuse the bytes."""
     html = render_template(template, invoice=invoice, items=items)
-    filename = f"invoice_{invoice.invoice_number}.pdf"
-    return _upload_pdf(filename, html)
+    pdf_bytes = _render_pdf_bytes(html)
+    return _store_pdf(f"invoice_{invoice.invoice_number}.pdf", pdf_bytes), pdf_bytes
 
 
-def render_bol_pdf(bol, vehicles, template="pdf/bol.html"):
+def render_invoice_pdf(invoice, items, template="pdf/invoice.html"):
+    return render_invoice_pdf_with_bytes(invoice, items, template)[0]
+
+
+def render_bol_pdf_with_bytes(bol, vehicles, template="pdf/bol.html"):
+    """Render and upload a BOL PDF, returning (url, pdf_bytes) so callers can reuse the bytes."""
     html = render_template(template, bol=bol, vehicles=vehicles)
-    filename = f"bol_{bol.bol_number}.pdf"
-    return _upload_pdf(filename, html)
+    pdf_bytes = _render_pdf_bytes(html)
+    return _store_pdf(f"bol_{bol.bol_number}.pdf", pdf_bytes), pdf_bytes
+
+
+def render_bol_pdf(bol, vehicles, template="pdf/bol.html"):
+    return render_bol_pdf_with_bytes(bol, vehicles, template)[0]
 
 
 def render_vehicle_statement_pdf(vehicle, statement, totals, template="pdf/vehicle_statement.html"):
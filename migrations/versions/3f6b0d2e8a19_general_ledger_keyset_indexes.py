@@ -0,0 +1,32 @@
+"""general ledger keyset indexes
+
+Revision ID: 3f6b0d2e8a19
+Revises: e2a4f81c6d95
+Create Date: 2026-10-17 15:08:52.117403
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6b0d2e8a19'
+down_revision = 'e2a4f81c6d95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('journal_entries', schema=None) as batch_op:
+        batch_op.create_index('ix_journal_entries_date_id', ['entry_date', 'id'], unique=False)
+
+    with op.batch_alter_table('journal_lines', schema=None) as batch_op:
+        batch_op.create_index('ix_journal_lines_account_entry', ['account_id', 'entry_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('journal_lines', schema=None) as batch_op:
+        batch_op.drop_index('ix_journal_lines_account_entry')
+
+    with op.batch_alter_table('journal_entries', schema=None) as batch_op:
+        batch_op.drop_index('ix_journal_entries_date_id')
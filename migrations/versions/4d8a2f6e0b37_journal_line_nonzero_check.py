@@ -0,0 +1,43 @@
+"""journal line nonzero check
+
+Revision ID: 4d8a2f6e0b37
+Revises: 9c3e5a7b1d20
+Create Date: 2026-10-17 11:26:03.918244
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d8a2f6e0b37'
+down_revision = '9c3e5a7b1d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # NOT VALID: enforced for new rows only; existing ledger rows are left untouched
+        op.execute(
+            "ALTER TABLE journal_lines ADD CONSTRAINT ck_journal_lines_nonzero "
+            "CHECK (debit <> 0 OR credit <> 0) NOT VALID"
+        )
+        return
+    # Elsewhere the constraint covers existing rows too; never delete ledger rows here, let an operator decide
+    offending = bind.execute(sa.text(
+        "SELECT COUNT(*) FROM journal_lines WHERE COALESCE(debit, 0) = 0 AND COALESCE(credit, 0) = 0"
+    )).scalar()
+    if offending:
+        raise RuntimeError(
+            f"{offending} journal_lines row(s) have neither a debit nor a credit; "
+            "review them before adding ck_journal_lines_nonzero"
+        )
+    with op.batch_alter_table('journal_lines', schema=None) as batch_op:
+        batch_op.create_check_constraint('ck_journal_lines_nonzero', 'debit <> 0 OR credit <> 0')
+
+
+def downgrade():
+    with op.batch_alter_table('journal_lines', schema=None) as batch_op:
+        batch_op.drop_constraint('ck_journal_lines_nonzero', type_='check')
@@ -0,0 +1,38 @@
+"""monthly created_at indexes
+
+Revision ID: 5e9a1c7d3b42
+Revises: 8a4c6e2f1b73
+Create Date: 2026-10-17 18:41:06.529174
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e9a1c7d3b42'
+down_revision = '8a4c6e2f1b73'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('international_costs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_international_costs_created_at'), ['created_at'], unique=False)
+
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_invoices_created_at'), ['created_at'], unique=False)
+
+    with op.batch_alter_table('shipments', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_shipments_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('shipments', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_shipments_created_at'))
+
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_invoices_created_at'))
+
+    with op.batch_alter_table('international_costs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_international_costs_created_at'))
@@ -0,0 +1,32 @@
+"""dashboard aggregate indexes
+
+Revision ID: 6b1f0c2d9a41
+Revises: 2285d0af6773
+Create Date: 2026-10-17 09:12:41.204118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b1f0c2d9a41'
+down_revision = '2285d0af6773'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.create_index('ix_invoices_status_type_total', ['status', 'invoice_type', 'total_omr'], unique=False)
+
+    with op.batch_alter_table('journal_entries', schema=None) as batch_op:
+        batch_op.create_index('ix_journal_entries_date_client_fund', ['entry_date', 'is_client_fund'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('journal_entries', schema=None) as batch_op:
+        batch_op.drop_index('ix_journal_entries_date_client_fund')
+
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.drop_index('ix_invoices_status_type_total')
@@ -0,0 +1,26 @@
+"""invoice pdf fingerprint
+
+Revision ID: 8a4c6e2f1b73
+Revises: 3f6b0d2e8a19
+Create Date: 2026-10-17 16:41:09.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4c6e2f1b73'
+down_revision = '3f6b0d2e8a19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('pdf_fingerprint', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.drop_column('pdf_fingerprint')
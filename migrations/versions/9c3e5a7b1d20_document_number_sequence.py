@@ -0,0 +1,27 @@
+"""document number sequence
+
+Revision ID: 9c3e5a7b1d20
+Revises: 6b1f0c2d9a41
+Create Date: 2026-10-17 10:04:18.551902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c3e5a7b1d20'
+down_revision = '6b1f0c2d9a41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Sequences only exist on PostgreSQL; other backends use the clock fallback
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(sa.schema.CreateSequence(sa.Sequence('document_number_seq')))
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(sa.schema.DropSequence(sa.Sequence('document_number_seq')))
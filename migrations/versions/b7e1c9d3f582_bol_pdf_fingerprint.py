@@ -0,0 +1,26 @@
+"""bol pdf fingerprint
+
+Revision ID: b7e1c9d3f582
+Revises: 4d8a2f6e0b37
+Create Date: 2026-10-17 13:02:47.330615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e1c9d3f582'
+down_revision = '4d8a2f6e0b37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('bills_of_lading', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('pdf_fingerprint', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('bills_of_lading', schema=None) as batch_op:
+        batch_op.drop_column('pdf_fingerprint')
@@ -0,0 +1,28 @@
+"""journal line covering index
+
+Revision ID: c3d5f7a9e1b4
+Revises: 5e9a1c7d3b42
+Create Date: 2026-10-17 20:12:37.845310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3d5f7a9e1b4'
+down_revision = '5e9a1c7d3b42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('journal_lines', schema=None) as batch_op:
+        batch_op.drop_index('ix_journal_lines_account_entry')
+        batch_op.create_index('ix_journal_lines_account_entry', ['account_id', 'entry_id'], unique=False, postgresql_include=['debit', 'credit'])
+
+
+def downgrade():
+    with op.batch_alter_table('journal_lines', schema=None) as batch_op:
+        batch_op.drop_index('ix_journal_lines_account_entry')
+        batch_op.create_index('ix_journal_lines_account_entry', ['account_id', 'entry_id'], unique=False)
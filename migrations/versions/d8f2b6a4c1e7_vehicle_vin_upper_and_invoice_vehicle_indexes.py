@@ -0,0 +1,32 @@
+"""vehicle vin upper and invoice vehicle indexes
+
+Revision ID: d8f2b6a4c1e7
+Revises: c3d5f7a9e1b4
+Create Date: 2026-10-17 21:03:52.418667
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8f2b6a4c1e7'
+down_revision = 'c3d5f7a9e1b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.create_index('ix_invoices_vehicle_created', ['vehicle_id', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('vehicles', schema=None) as batch_op:
+        batch_op.create_index('ix_vehicles_vin_upper', [sa.text('upper(vin)')], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('vehicles', schema=None) as batch_op:
+        batch_op.drop_index('ix_vehicles_vin_upper')
+
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.drop_index('ix_invoices_vehicle_created')
@@ -0,0 +1,47 @@
+"""account code parts
+
+Revision ID: e2a4f81c6d95
+Revises: b7e1c9d3f582
+Create Date: 2026-10-17 14:21:09.664730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a4f81c6d95'
+down_revision = 'b7e1c9d3f582'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('accounts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('code_class', sa.String(length=1), nullable=True))
+        batch_op.add_column(sa.Column('root_code', sa.String(length=20), nullable=True))
+        batch_op.create_index(batch_op.f('ix_accounts_code_class'), ['code_class'], unique=False)
+        batch_op.create_index(batch_op.f('ix_accounts_root_code'), ['root_code'], unique=False)
+
+    # Backfill from code ("R300-C00001" -> "R", "R300"), same rule as Account._sync_code_parts
+    conn = op.get_bind()
+    accounts = sa.table('accounts', sa.column('id', sa.Integer), sa.column('code', sa.String),
+                        sa.column('code_class', sa.String), sa.column('root_code', sa.String))
+    rows = [
+        {'acc_id': acc_id, 'cls': (code or '').strip()[:1] or None, 'root': (code or '').strip().split('-', 1)[0] or None}
+        for acc_id, code in conn.execute(sa.select(accounts.c.id, accounts.c.code))
+    ]
+    if rows:
+        conn.execute(
+            accounts.update().where(accounts.c.id == sa.bindparam('acc_id'))
+            .values(code_class=sa.bindparam('cls'), root_code=sa.bindparam('root')),
+            rows,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('accounts', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_accounts_root_code'))
+        batch_op.drop_index(batch_op.f('ix_accounts_code_class'))
+        batch_op.drop_column('root_code')
+        batch_op.drop_column('code_class')
@@ -0,0 +1,30 @@
+"""vehicle statement pdf
+
+Revision ID: e4a7c2d9f6b1
+Revises: d8f2b6a4c1e7
+Create Date: 2026-10-17 23:41:09.526384
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a7c2d9f6b1'
+down_revision = 'd8f2b6a4c1e7'
+branch_labels = None
+depends_on = None
+
+
+# recreate='never': rebuilding vehicles on SQLite would drop the expression index ix_vehicles_vin_upper,
+# which reflection cannot see
+def upgrade():
+    with op.batch_alter_table('vehicles', schema=None, recreate='never') as batch_op:
+        batch_op.add_column(sa.Column('statement_pdf_path', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('statement_pdf_fingerprint', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('vehicles', schema=None, recreate='never') as batch_op:
+        batch_op.drop_column('statement_pdf_fingerprint')
+        batch_op.drop_column('statement_pdf_path')
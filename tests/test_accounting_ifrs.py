@@ -1,13 +1,22 @@
 import os
 import unittest
+from unittest.mock import patch
 
 # Ensure in-memory DB for tests BEFORE importing app
 os.environ["DATABASE_URL"] = "sqlite:///:memory:"
 
 from app import create_app
 from app.extensions import db
-from app.models import Account, JournalEntry, JournalLine, Vehicle, Customer
-from app.blueprints.accounting.routes import _post_journal, create_vehicle_chart, _get_vehicle_account_code
+from app.models import Account, JournalEntry, JournalLine, Vehicle, Customer, OperationalExpense, Role, User
+from app.blueprints.accounting.routes import (
+    _post_journal,
+    create_vehicle_chart,
+    _get_vehicle_account_code,
+    record_operational_cost,
+    record_operational_costs_bulk,
+    record_vehicle_purchase,
+)
+from app.utils.numbering import next_document_number
 
 
 class IFRSAccountingTests(unittest.TestCase):
@@ -109,6 +118,91 @@ class IFRSAccountingTests(unittest.TestCase):
         code = _get_vehicle_account_code(v.id, 'deposit', 'L200')
         self.assertTrue(code.startswith('L200-V'))
 
+    def test_bulk_operational_costs(self):
+        db.session.add(Account(code="E200", name="Logistics", type="EXPENSE"))
+        v = Vehicle(vin="BULKVIN1")
+        db.session.add(v)
+        db.session.commit()
+        n = record_operational_costs_bulk([
+            {"vehicle_id": v.id, "category": "customs", "amount_value": 40},
+            {"vehicle_id": None, "category": "misc", "amount_value": 10},
+            {"vehicle_id": None, "category": "misc", "amount_value": 5, "paid_from_bank": False},
+        ])
+        db.session.commit()
+        self.assertEqual(n, 3)
+        self.assertEqual(db.session.query(OperationalExpense).count(), 3)
+        # Unpaid cost gets no journal; the others post balanced Dr expense / Cr bank entries
+        self.assertEqual(db.session.query(JournalEntry).count(), 2)
+        customs_code = _get_vehicle_account_code(v.id, 'customs', 'E200')
+        customs_total = (
+            db.session.query(db.func.sum(JournalLine.debit))
+            .join(Account, JournalLine.account_id == Account.id)
+            .filter(Account.code == customs_code)
+            .scalar()
+        )
+        self.assertAlmostEqual(float(customs_total), 40.0, places=3)
+        bank_credit = (
+            db.session.query(db.func.sum(JournalLine.credit))
+            .join(Account, JournalLine.account_id == Account.id)
+            .filter(Account.code == "A100")
+            .scalar()
+        )
+        self.assertAlmostEqual(float(bank_credit), 50.0, places=3)
+
+    def test_sub_fil_lines_are_dropped(self):
+        # Below 0.0005 an amount is stored as 0.000 in Numeric(14,3), so the line is skipped
+        # instead of violating ck_journal_lines_nonzero; other amounts are rounded to 3 dp
+        entry = _post_journal(
+            description="Tiny",
+            reference="Z1",
+            lines=[("A100", 0.0004, 0.0), ("R300", 0.0, 0.0004), ("A100", 1.2346, 0.0), ("R300", 0.0, 1.2346)],
+        )
+        db.session.commit()
+        lines = db.session.query(JournalLine).filter_by(entry_id=entry.id).order_by(JournalLine.id).all()
+        self.assertEqual([(float(l.debit), float(l.credit)) for l in lines], [(1.235, 0.0), (0.0, 1.235)])
+
+    def test_journals_new_with_zero_amount_line(self):
+        role = Role(name="accountant")
+        user = User(name="Acc", email="acc@example.com", role=role)
+        user.set_password("x")
+        db.session.add_all([role, user])
+        db.session.commit()
+        client = self.app.test_client()
+        with client.session_transaction() as sess:
+            sess["_user_id"] = str(user.id)
+        resp = client.post("/acct/journals/new", data={
+            "description": "Manual", "code": ["A100", "R300"], "debit": ["0.0004", "0"], "credit": ["0", "0.0004"],
+        })
+        self.assertEqual(resp.status_code, 302)
+        entry = db.session.query(JournalEntry).filter_by(description="Manual").one()
+        self.assertEqual(db.session.query(JournalLine).filter_by(entry_id=entry.id).count(), 0)
+
+    def test_converted_amounts_round_half_up(self):
+        # 12.5 USD * 0.385 is exactly 4.8125; it is stored as 4.813, as the Numeric columns rounded it
+        db.session.add(Account(code="E200", name="Logistics", type="EXPENSE"))
+        db.session.add(Account(code="A200", name="Inventory", type="ASSET"))
+        v = Vehicle(vin="ROUNDVIN1")
+        db.session.add(v)
+        db.session.commit()
+        self.app.config["OMR_EXCHANGE_RATE"] = 0.385
+        self.assertEqual(record_vehicle_purchase(v.id, None, 12.5), 4.813)
+        record_operational_cost(None, None, "misc", 12.5, currency="USD")
+        record_operational_costs_bulk([{"category": "misc", "amount_value": 12.5, "currency": "USD"}])
+        db.session.commit()
+        self.assertEqual({float(e.amount_omr) for e in db.session.query(OperationalExpense).all()}, {4.813})
+        amounts = {float(l.debit or l.credit) for l in db.session.query(JournalLine).all()}
+        self.assertEqual(amounts, {4.813})
+
+    def test_fallback_document_numbers_are_unique(self):
+        # Outside PostgreSQL numbers come from the clock; calls within one microsecond,
+        # or after the clock steps back, must not repeat a number
+        start = next_document_number("INV")
+        base = int(start[4:]) + 1000
+        clock = [base * 1000, base * 1000 + 300, (base - 500) * 1000]
+        with patch("app.utils.numbering.time.time_ns", side_effect=clock):
+            numbers = [next_document_number("INV") for _ in clock]
+        self.assertEqual(numbers, [f"INV-{base}", f"INV-{base + 1}", f"INV-{base + 2}"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,178 @@
+import os
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+# Ensure in-memory DB for tests BEFORE importing app
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+
+from app import create_app
+from app.extensions import db
+from app.models import (
+    Account, Customer, Invoice, InvoiceItem, JournalEntry, JournalLine, Payment, Role, User, Vehicle,
+)
+
+
+class AccountingRouteTests(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        # Seed minimal COA
+        db.session.add(Account(code="A100", name="Bank", type="ASSET"))
+        db.session.add(Account(code="A300", name="Accounts Receivable", type="ASSET"))
+        db.session.add(Account(code="L200", name="Client Deposits", type="LIABILITY"))
+        db.session.add(Account(code="R300", name="Service Fees", type="REVENUE"))
+        role = Role(name="accountant")
+        user = User(name="Acc", email="acc@example.com", role=role)
+        user.set_password("x")
+        self.customer = Customer(company_name="ACME")
+        db.session.add_all([role, user, self.customer])
+        db.session.commit()
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess["_user_id"] = str(user.id)
+
+    def tearDown(self):
+        try:
+            db.session.remove()
+            db.drop_all()
+        finally:
+            self.ctx.pop()
+
+    def _render_context(self, url: str, **args) -> dict:
+        # The context the view at url hands to its template
+        with patch("app.blueprints.accounting.routes.render_template", return_value="") as render:
+            resp = self.client.get(url, query_string=args or None)
+        self.assertEqual(resp.status_code, 200)
+        return render.call_args.kwargs
+
+    def _report(self, **args) -> dict:
+        return self._render_context("/acct/reports", **args)
+
+    def test_partial_then_settling_payment(self):
+        v = Vehicle(vin="PAYVIN1", owner_customer_id=self.customer.id)
+        db.session.add(v)
+        db.session.flush()
+        inv = Invoice(invoice_number="INV-P1", customer_id=self.customer.id, invoice_type="SERVICE",
+                      vehicle_id=v.id, total_omr=300, status="Unpaid")
+        db.session.add(inv)
+        db.session.commit()
+
+        resp = self.client.post("/acct/payments/new", data={
+            "invoice_id": inv.id, "amount": "100", "method": "cash", "vin": "payvin1",
+        })
+        self.assertEqual(resp.status_code, 302)
+        db.session.expire_all()
+        self.assertEqual(db.session.get(Invoice, inv.id).status, "Partial")
+
+        self.client.post("/acct/payments/new", data={
+            "invoice_id": inv.id, "amount": "200", "method": "cash", "vin": "PAYVIN1",
+        })
+        db.session.expire_all()
+        inv = db.session.get(Invoice, inv.id)
+        self.assertEqual(inv.status, "Paid")
+        self.assertEqual(sorted(float(p.amount_omr) for p in inv.payments), [100.0, 200.0])
+
+    def test_ar_aging_counts_each_invoice_and_payment_once(self):
+        beta = Customer(company_name="Beta")
+        db.session.add(beta)
+        db.session.flush()
+        inv1 = Invoice(invoice_number="INV-A1", customer_id=self.customer.id, total_omr=300, status="Partial")
+        inv2 = Invoice(invoice_number="INV-A2", customer_id=self.customer.id, total_omr=200, status="Unpaid")
+        inv3 = Invoice(invoice_number="INV-B1", customer_id=beta.id, total_omr=80, status="Paid")
+        inv1.items = [InvoiceItem(description="Car", amount_omr=250), InvoiceItem(description="Fee", amount_omr=50)]
+        inv1.payments = [Payment(amount_omr=100), Payment(amount_omr=50)]
+        inv2.items = [InvoiceItem(description="Service", amount_omr=200)]
+        inv3.items = [InvoiceItem(description="Fee", amount_omr=40), InvoiceItem(description="Fee", amount_omr=40)]
+        inv3.payments = [Payment(amount_omr=20), Payment(amount_omr=20), Payment(amount_omr=40)]
+        db.session.add_all([inv1, inv2, inv3])
+        db.session.commit()
+
+        table = self._report(type="ar_aging")["table"]
+        # ACME: 500 billed - 150 paid; Beta: 80 billed - 80 paid
+        self.assertEqual(sorted(table), [("ACME", 350.0), ("Beta", 0.0)])
+
+    def test_general_ledger_pages_follow_the_cursor(self):
+        bank = db.session.query(Account).filter_by(code="A100").one()
+        other = db.session.query(Account).filter_by(code="R300").one()
+        # Entries share dates and carry several bank lines, so every key of the cursor is exercised
+        layout = [(datetime(2026, 1, 5), 2), (datetime(2026, 1, 9), 1), (datetime(2026, 1, 9), 2), (datetime(2026, 2, 1), 2)]
+        expected = []
+        amount = 0
+        for n, (day, bank_lines) in enumerate(layout, start=1):
+            entry = JournalEntry(entry_date=day, description=f"E{n}")
+            for _ in range(bank_lines):
+                amount += 1
+                entry.lines.append(JournalLine(account_id=bank.id, debit=amount, credit=0))
+                entry.lines.append(JournalLine(account_id=other.id, debit=0, credit=amount))
+                expected.append((day.strftime("%Y-%m-%d"), f"E{n}", float(amount), 0.0))
+            db.session.add(entry)
+        # A credit to the bank, so the balance carried across pages is not just the sum of debits
+        refund = JournalEntry(entry_date=datetime(2026, 2, 1), description="Refund")
+        refund.lines = [JournalLine(account_id=bank.id, debit=0, credit=4), JournalLine(account_id=other.id, debit=4, credit=0)]
+        db.session.add(refund)
+        expected.append(("2026-02-01", "Refund", 0.0, 4.0))
+        db.session.commit()
+
+        rows, pages = [], []
+        with patch("app.blueprints.accounting.routes._GENERAL_LEDGER_PAGE_SIZE", 3):
+            ctx = self._report(type="general_ledger", code="A100")
+            while True:
+                pages.append(len(ctx["table"]))
+                rows.extend(ctx["table"])
+                if not ctx["next_url"]:
+                    break
+                ctx = self._render_context(ctx["next_url"])
+        self.assertEqual(pages, [3, 3, 2])
+        # Nothing skipped or repeated, in ledger order, and the pages add up to the account balance
+        self.assertEqual(rows, expected)
+        self.assertAlmostEqual(sum(dr - cr for _d, _desc, dr, cr in rows), 1 + 2 + 3 + 4 + 5 + 6 + 7 - 4, places=3)
+
+    def test_invoice_by_vin_prefers_largest_outstanding_then_latest(self):
+        v = Vehicle(vin="VINORDER1")
+        db.session.add(v)
+        db.session.flush()
+        day = datetime(2026, 3, 1)
+
+        def invoice(number, total, days, paid=()):
+            inv = Invoice(invoice_number=number, customer_id=self.customer.id, vehicle_id=v.id,
+                          total_omr=total, status="Unpaid", created_at=day + timedelta(days=days))
+            inv.items = [InvoiceItem(description=f"{number} item", amount_omr=total)]
+            inv.payments = [Payment(amount_omr=amt) for amt in paid]
+            db.session.add(inv)
+            return inv
+
+        invoice("V-OLD", 250, 0)
+        mid = invoice("V-MID", 300, 1, paid=(60, 40))
+        invoice("V-PAID", 100, 2, paid=(100,))
+        invoice("V-OVER", 50, 3, paid=(80,))  # overpaid: its negative balance counts as 0
+        db.session.commit()
+
+        def pick():
+            resp = self.client.get("/acct/api/invoices/by_vin", query_string={"vin": "vinorder1"})
+            self.assertEqual(resp.status_code, 200)
+            return resp.get_json()
+
+        out = pick()
+        self.assertEqual((out["invoice_number"], out["balance_omr"]), ("V-OLD", 250.0))
+        self.assertEqual(out["items"], [{"description": "V-OLD item", "amount_omr": 250.0}])
+        self.assertEqual(out["vehicle"]["vin"], "VINORDER1")
+
+        old = db.session.query(Invoice).filter_by(invoice_number="V-OLD").one()
+        old.payments.append(Payment(amount_omr=100))
+        db.session.commit()
+        out = pick()
+        self.assertEqual((out["invoice_number"], out["paid_omr"], out["balance_omr"]), ("V-MID", 100.0, 200.0))
+
+        # Once nothing is outstanding the latest invoice wins, the overpaid one included
+        old.payments.append(Payment(amount_omr=150))
+        mid.payments.append(Payment(amount_omr=200))
+        db.session.commit()
+        out = pick()
+        self.assertEqual((out["invoice_number"], out["balance_omr"]), ("V-OVER", 0.0))
+
+
+if __name__ == "__main__":
+    unittest.main()